@@ -0,0 +1,23 @@
+"""add media keyset pagination index"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20241017_0004"
+down_revision = "20241009_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_media_user_created_id",
+        "media_items",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_user_created_id", table_name="media_items")
@@ -0,0 +1,24 @@
+"""add media favorites index"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20241017_0005"
+down_revision = "20241017_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_media_user_fav_created",
+        "media_items",
+        ["user_id", "is_favorite", sa.text("created_at DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_user_fav_created", table_name="media_items", if_exists=True)
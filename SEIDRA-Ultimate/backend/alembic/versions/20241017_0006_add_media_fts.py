@@ -0,0 +1,71 @@
+"""add media full-text search index"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "20241017_0006"
+down_revision = "20241017_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS media_items_fts USING fts5(prompt, tags)")
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_fts_insert AFTER INSERT ON media_items BEGIN
+            INSERT INTO media_items_fts(rowid, prompt, tags)
+            VALUES (
+                new.rowid,
+                json_extract(new.metadata, '$.prompt'),
+                (SELECT group_concat(value, ' ') FROM json_each(new.tags))
+            );
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_fts_delete AFTER DELETE ON media_items BEGIN
+            DELETE FROM media_items_fts WHERE rowid = old.rowid;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_fts_update AFTER UPDATE OF metadata, tags ON media_items BEGIN
+            DELETE FROM media_items_fts WHERE rowid = old.rowid;
+            INSERT INTO media_items_fts(rowid, prompt, tags)
+            VALUES (
+                new.rowid,
+                json_extract(new.metadata, '$.prompt'),
+                (SELECT group_concat(value, ' ') FROM json_each(new.tags))
+            );
+        END
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO media_items_fts(rowid, prompt, tags)
+        SELECT
+            rowid,
+            json_extract(metadata, '$.prompt'),
+            (SELECT group_concat(value, ' ') FROM json_each(media_items.tags))
+        FROM media_items
+        """
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS media_items_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS media_items_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS media_items_fts_insert")
+    op.execute("DROP TABLE IF EXISTS media_items_fts")
@@ -0,0 +1,74 @@
+"""add per-user media count summary"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "20241017_0007"
+down_revision = "20241017_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_media_counts (
+            user_id INTEGER NOT NULL,
+            is_favorite BOOLEAN NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, is_favorite)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_count_insert AFTER INSERT ON media_items BEGIN
+            INSERT INTO user_media_counts(user_id, is_favorite, count)
+            VALUES (new.user_id, coalesce(new.is_favorite, 0), 1)
+            ON CONFLICT(user_id, is_favorite) DO UPDATE SET count = count + 1;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_count_delete AFTER DELETE ON media_items BEGIN
+            UPDATE user_media_counts SET count = count - 1
+            WHERE user_id = old.user_id AND is_favorite = coalesce(old.is_favorite, 0);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS media_items_count_update
+        AFTER UPDATE OF user_id, is_favorite ON media_items BEGIN
+            UPDATE user_media_counts SET count = count - 1
+            WHERE user_id = old.user_id AND is_favorite = coalesce(old.is_favorite, 0);
+            INSERT INTO user_media_counts(user_id, is_favorite, count)
+            VALUES (new.user_id, coalesce(new.is_favorite, 0), 1)
+            ON CONFLICT(user_id, is_favorite) DO UPDATE SET count = count + 1;
+        END
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO user_media_counts(user_id, is_favorite, count)
+        SELECT user_id, coalesce(is_favorite, 0), count(*) FROM media_items
+        GROUP BY user_id, coalesce(is_favorite, 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS media_items_count_update")
+    op.execute("DROP TRIGGER IF EXISTS media_items_count_delete")
+    op.execute("DROP TRIGGER IF EXISTS media_items_count_insert")
+    op.execute("DROP TABLE IF EXISTS user_media_counts")
@@ -0,0 +1,48 @@
+"""mirror media prompt into its own column"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20241017_0008"
+down_revision = "20241017_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_items", sa.Column("prompt", sa.Text(), nullable=True))
+    op.create_index("ix_media_items_prompt", "media_items", ["prompt"])
+
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute(
+            "UPDATE media_items SET prompt = json_extract(metadata, '$.prompt') "
+            "WHERE prompt IS NULL"
+        )
+        return
+
+    # No portable JSON path operator: copy the prompt over row by row.
+    media_items = sa.table(
+        "media_items",
+        sa.column("id", sa.String(36)),
+        sa.column("metadata", sa.JSON()),
+        sa.column("prompt", sa.Text()),
+    )
+    rows = bind.execute(
+        sa.select(media_items.c.id, media_items.c.metadata).where(media_items.c.prompt.is_(None))
+    ).all()
+    for media_id, metadata in rows:
+        prompt = metadata.get("prompt") if isinstance(metadata, dict) else None
+        if prompt is None:
+            continue
+        bind.execute(
+            media_items.update().where(media_items.c.id == media_id).values(prompt=prompt)
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_items_prompt", table_name="media_items")
+    with op.batch_alter_table("media_items") as batch_op:
+        batch_op.drop_column("prompt")
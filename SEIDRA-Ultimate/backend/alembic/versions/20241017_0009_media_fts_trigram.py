@@ -0,0 +1,87 @@
+"""rebuild the media full-text index with the trigram tokenizer"""
+
+from __future__ import annotations
+
+import sqlite3
+
+from alembic import op
+
+revision = "20241017_0009"
+down_revision = "20241017_0008"
+branch_labels = None
+depends_on = None
+
+# Index decoded tag values: the stored JSON text escapes non-ASCII characters.
+_NEW_TAGS = "(SELECT group_concat(value, ' ') FROM json_each(new.tags))"
+
+
+def _create_triggers() -> None:
+    op.execute(
+        f"""
+        CREATE TRIGGER media_items_fts_insert AFTER INSERT ON media_items BEGIN
+            INSERT INTO media_items_fts(rowid, prompt, tags)
+            VALUES (new.rowid, json_extract(new.metadata, '$.prompt'), {_NEW_TAGS});
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER media_items_fts_delete AFTER DELETE ON media_items BEGIN
+            DELETE FROM media_items_fts WHERE rowid = old.rowid;
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER media_items_fts_update AFTER UPDATE OF metadata, tags ON media_items BEGIN
+            DELETE FROM media_items_fts WHERE rowid = old.rowid;
+            INSERT INTO media_items_fts(rowid, prompt, tags)
+            VALUES (new.rowid, json_extract(new.metadata, '$.prompt'), {_NEW_TAGS});
+        END
+        """
+    )
+
+
+def _drop_triggers() -> None:
+    for suffix in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS media_items_fts_{suffix}")
+
+
+def _rebuild(tokenize: str) -> None:
+    _drop_triggers()
+    op.execute("DROP TABLE IF EXISTS media_items_fts")
+    op.execute(f"CREATE VIRTUAL TABLE media_items_fts USING fts5(prompt, tags{tokenize})")
+    _create_triggers()
+    op.execute(
+        """
+        INSERT INTO media_items_fts(rowid, prompt, tags)
+        SELECT
+            rowid,
+            json_extract(metadata, '$.prompt'),
+            (SELECT group_concat(value, ' ') FROM json_each(media_items.tags))
+        FROM media_items
+        """
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+
+    if sqlite3.sqlite_version_info < (3, 34):
+        # No trigram tokenizer: a word index would change search semantics,
+        # so drop it and let searches use the LIKE scan.
+        _drop_triggers()
+        op.execute("DROP TABLE IF EXISTS media_items_fts")
+        return
+
+    _rebuild(", tokenize='trigram'")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite" or sqlite3.sqlite_version_info < (3, 34):
+        return
+
+    _rebuild("")
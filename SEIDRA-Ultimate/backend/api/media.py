@@ -11,7 +11,7 @@ import uuid
 import zipfile
 from datetime import datetime, timedelta
 from pathlib import Path, PurePath
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import (
     APIRouter,
@@ -64,6 +64,23 @@ def _validate_export_filename(filename: str) -> None:
     if ".." in pure_path.parts:
         raise HTTPException(status_code=400, detail="Invalid export file name")
 
+
+def _encode_media_cursor(cursor: Optional[Tuple[datetime, str]]) -> Optional[str]:
+    if cursor is None:
+        return None
+    created_at, media_id = cursor
+    return f"{created_at.isoformat()}|{media_id}"
+
+
+def _decode_media_cursor(cursor: str) -> Tuple[datetime, str]:
+    created_at, separator, media_id = cursor.partition("|")
+    if not separator or not media_id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        return datetime.fromisoformat(created_at), media_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 router = APIRouter(
     dependencies=[Depends(verify_token), *media_rate_limit_dependencies]
 )
@@ -115,6 +132,7 @@ class MediaItemResponse(BaseModel):
 class MediaListResponse(BaseModel):
     total: int
     items: List[MediaItemResponse]
+    next_cursor: Optional[str] = None
 
 class MediaStats(BaseModel):
     total_images: int
@@ -316,6 +334,7 @@ async def list_media(
     date_from: Optional[str] = Query(default=None),
     date_to: Optional[str] = Query(default=None),
     persona_id: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
     current_user=Depends(verify_token),
 ):
     """List media items with advanced filtering"""
@@ -338,7 +357,9 @@ async def list_media(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date_to format. Use ISO8601.")
 
-        media_items, total = db.get_media_items(
+        parsed_cursor = _decode_media_cursor(cursor) if cursor else None
+
+        media_items, total, next_cursor = db.get_media_items(
             user_id=user_id,
             limit=limit,
             offset=offset,
@@ -348,10 +369,12 @@ async def list_media(
             date_from=parsed_date_from,
             date_to=parsed_date_to,
             persona_id=persona_id,
+            cursor=parsed_cursor,
         )
 
         return MediaListResponse(
             total=total,
+            next_cursor=_encode_media_cursor(next_cursor),
             items=[
                 MediaItemResponse(
                     id=item.id,
@@ -624,7 +647,7 @@ async def export_media(export_request: ExportRequest, current_user=Depends(verif
     db = DatabaseService()
     try:
         # Get media items
-        media_items, _ = db.get_media_items(user_id=current_user.id, limit=10000)
+        media_items, _, _ = db.get_media_items(user_id=current_user.id, limit=10000)
         selected_items = [
             item for item in media_items
             if item.id in export_request.media_ids
@@ -53,6 +53,7 @@ telemetry_service = TelemetryService(
     notification_service=notification_service,
 )
 model_manager.attach_telemetry_service(telemetry_service)
+websocket_manager.attach_system_status_provider(telemetry_service.current_keyframe)
 
 
 @asynccontextmanager
@@ -127,6 +128,8 @@ async def lifespan(app: FastAPI):
     await telemetry_service.start()
     print("✅ Telemetry service running")
 
+    await websocket_manager.start()
+
     print("🚀 SEIDRA Backend ready!")
 
     yield
@@ -140,6 +143,7 @@ async def lifespan(app: FastAPI):
     await gpu_monitor.stop_monitoring()
     await model_manager.cleanup()
     await telemetry_service.stop()
+    await websocket_manager.stop()
 
 
 app = FastAPI(
@@ -258,10 +262,19 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
 if __name__ == "__main__":
     import uvicorn
 
+    try:
+        import uvloop  # noqa: F401 - only probing availability (absent on Windows)
+        event_loop = "uvloop"
+    except ImportError:
+        event_loop = "asyncio"
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
         log_level="info",
+        loop=event_loop,
+        # Large broadcasts are compressed once by WebSocketManager instead.
+        ws_per_message_deflate=False,
     )
@@ -6,10 +6,13 @@ SQLite with SQLAlchemy ORM
 from __future__ import annotations
 
 import asyncio
+import json
 import os
 import secrets
+import sqlite3
 import sys
 import uuid
+import weakref
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
@@ -23,33 +26,67 @@ except ImportError:  # pragma: no cover - environnement minimal sans Alembic
     command = None  # type: ignore[assignment]
     AlembicConfig = None  # type: ignore[assignment]
 from sqlalchemy import (
+    DDL,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    and_,
+    bindparam,
     create_engine,
+    event,
     func,
+    literal_column,
     or_,
     select,
+    text,
 )
+from sqlalchemy.sql import Executable, Select
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
+from sqlalchemy.engine import Row, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from core.config import secret_manager, settings
 from api.settings_models import DEFAULT_SETTINGS
 
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Extra engine options for ``url``.
+
+    An in-memory SQLite database lives only as long as its connection, so it
+    is pinned to a single shared connection.
+    """
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {}
+    in_memory = parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+    if not in_memory:
+        return {}
+    return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+
 DATABASE_URL = settings.database_url
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+engine = create_engine(DATABASE_URL, echo=False, future=True, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 _SCHEMA_INITIALISED = False
 
+# Per engine: whether the optional SQLite side tables exist. Looked up once
+# instead of querying sqlite_master on every media listing.
+_SQLITE_TABLES_PRESENT: "weakref.WeakKeyDictionary[Any, Dict[str, bool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def ensure_schema() -> None:
     """Create database tables on first access if they do not exist."""
@@ -59,6 +96,7 @@ def ensure_schema() -> None:
         return
 
     Base.metadata.create_all(bind=engine)
+    _SQLITE_TABLES_PRESENT.clear()
     _SCHEMA_INITIALISED = True
 
 ALEMBIC_CONFIG_PATH = Path(__file__).resolve().parent.parent / "alembic.ini"
@@ -81,6 +119,7 @@ def run_migrations() -> None:
         raise RuntimeError("Impossible d'exécuter les migrations Alembic: module indisponible")
 
     command.upgrade(_configure_alembic(), "head")
+    _SQLITE_TABLES_PRESENT.clear()
 
 
 class User(Base):
@@ -167,6 +206,8 @@ class MediaItem(Base):
     file_type = Column(String(50), default="image")
     mime_type = Column(String(100), default="image/png")
     metadata_payload = Column("metadata", SQLiteJSON, default={})
+    # Mirror of metadata["prompt"], so search never parses the JSON blob.
+    prompt = Column(Text, index=True)
     tags = Column(SQLiteJSON, default=[])
     is_favorite = Column(Boolean, default=False)
     is_nsfw = Column(Boolean, default=False)
@@ -174,6 +215,160 @@ class MediaItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves the gallery ordering and keyset pagination as a range seek.
+        Index("ix_media_user_created_id", user_id, created_at.desc(), id.desc()),
+        # Favorites browsing: equality on both flags, rows already in page order.
+        Index(
+            "ix_media_user_fav_created",
+            user_id,
+            is_favorite,
+            created_at.desc(),
+            id.desc(),
+        ),
+    )
+
+
+# Full-text index over the prompt and tags of each media item. It keeps its
+# own copy of the text (the prompt lives inside the JSON metadata, so an
+# external-content table cannot read it back) and shares media_items' rowid.
+# The trigram tokenizer keeps the substring semantics of the LIKE scan.
+MEDIA_FTS_TABLE = "media_items_fts"
+# Tags are indexed as their decoded values joined by spaces: the stored JSON
+# text escapes non-ASCII characters and would match across tag separators.
+MEDIA_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {MEDIA_FTS_TABLE} USING fts5(prompt, tags, tokenize='trigram')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_insert AFTER INSERT ON media_items BEGIN
+        INSERT INTO {MEDIA_FTS_TABLE}(rowid, prompt, tags)
+        VALUES (
+            new.rowid,
+            json_extract(new.metadata, '$.prompt'),
+            (SELECT group_concat(value, ' ') FROM json_each(new.tags))
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_delete AFTER DELETE ON media_items BEGIN
+        DELETE FROM {MEDIA_FTS_TABLE} WHERE rowid = old.rowid;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_fts_update AFTER UPDATE OF metadata, tags ON media_items BEGIN
+        DELETE FROM {MEDIA_FTS_TABLE} WHERE rowid = old.rowid;
+        INSERT INTO {MEDIA_FTS_TABLE}(rowid, prompt, tags)
+        VALUES (
+            new.rowid,
+            json_extract(new.metadata, '$.prompt'),
+            (SELECT group_concat(value, ' ') FROM json_each(new.tags))
+        );
+    END
+    """,
+)
+
+def _supports_trigram_fts(ddl: Any, target: Any, bind: Any, **_kwargs: Any) -> bool:
+    # The trigram tokenizer ships with SQLite 3.34; older builds keep the
+    # LIKE scan instead of failing schema creation.
+    return bind.dialect.name == "sqlite" and sqlite3.sqlite_version_info >= (3, 34)
+
+
+for _statement in MEDIA_FTS_DDL:
+    event.listen(
+        MediaItem.__table__,
+        "after_create",
+        DDL(_statement).execute_if(callable_=_supports_trigram_fts),
+    )
+# Rowids restart with a recreated table, so stale index rows must go too.
+event.listen(
+    MediaItem.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {MEDIA_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+# Per-user media totals split by favourite flag, kept current by triggers so
+# unfiltered gallery pages read their total instead of counting rows.
+MEDIA_COUNTS_TABLE = "user_media_counts"
+MEDIA_COUNTS_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {MEDIA_COUNTS_TABLE} (
+        user_id INTEGER NOT NULL,
+        is_favorite BOOLEAN NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, is_favorite)
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_count_insert AFTER INSERT ON media_items BEGIN
+        INSERT INTO {MEDIA_COUNTS_TABLE}(user_id, is_favorite, count)
+        VALUES (new.user_id, coalesce(new.is_favorite, 0), 1)
+        ON CONFLICT(user_id, is_favorite) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_count_delete AFTER DELETE ON media_items BEGIN
+        UPDATE {MEDIA_COUNTS_TABLE} SET count = count - 1
+        WHERE user_id = old.user_id AND is_favorite = coalesce(old.is_favorite, 0);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS media_items_count_update
+    AFTER UPDATE OF user_id, is_favorite ON media_items BEGIN
+        UPDATE {MEDIA_COUNTS_TABLE} SET count = count - 1
+        WHERE user_id = old.user_id AND is_favorite = coalesce(old.is_favorite, 0);
+        INSERT INTO {MEDIA_COUNTS_TABLE}(user_id, is_favorite, count)
+        VALUES (new.user_id, coalesce(new.is_favorite, 0), 1)
+        ON CONFLICT(user_id, is_favorite) DO UPDATE SET count = count + 1;
+    END
+    """,
+)
+
+for _statement in MEDIA_COUNTS_DDL:
+    event.listen(
+        MediaItem.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    MediaItem.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {MEDIA_COUNTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+# Columns of a gallery row: everything the listing and export endpoints read.
+MEDIA_ITEM_ROW_COLUMNS = (
+    MediaItem.id,
+    MediaItem.user_id,
+    MediaItem.job_id,
+    MediaItem.file_path,
+    MediaItem.thumbnail_path,
+    MediaItem.file_type,
+    MediaItem.mime_type,
+    MediaItem.metadata_payload,
+    MediaItem.tags,
+    MediaItem.is_favorite,
+    MediaItem.is_nsfw,
+    MediaItem.nsfw_tags,
+    MediaItem.created_at,
+)
+
+# (count, page) statements per ``get_media_items`` filter shape.
+_GET_MEDIA_SQL_CACHE: Dict[Tuple[Any, ...], Tuple[Executable, Select]] = {}
+
+_FTS_TRIGRAM_LENGTH = 3
+
+
+def _media_fts_query(search: str) -> Optional[str]:
+    """Turn free text into a trigram FTS5 phrase matching it as a substring.
+
+    Returns ``None`` for text shorter than one trigram, which the index
+    cannot answer; callers fall back to a ``LIKE`` scan.
+    """
+
+    if len(search) < _FTS_TRIGRAM_LENGTH:
+        return None
+    escaped = search.replace('"', '""')
+    return f'"{escaped}"'
+
 
 class NSFWSettings(Base):
     __tablename__ = "nsfw_settings"
@@ -336,6 +531,18 @@ def _hash_password(password: str) -> str:
     return get_password_hash(password)
 
 
+def _password_matches(password: str, hashed_password: Optional[str]) -> bool:
+    if not hashed_password:
+        return False
+    from api.auth import verify_password
+
+    try:
+        return verify_password(password, hashed_password)
+    except ValueError:
+        # Not a hash the context recognises: treat it as a different secret.
+        return False
+
+
 def _update_default_user_rotation_settings(
     settings: Optional[Dict[str, Any]], rotated_at: datetime
 ) -> Dict[str, Any]:
@@ -367,17 +574,20 @@ def _build_default_user(existing: Optional[User] = None) -> Dict[str, Any]:
             payload["settings"] = base_settings
         return payload
 
-    hashed = _hash_password(password)
-    payload["hashed_password"] = hashed
     payload["is_active"] = True
 
-    if existing and existing.hashed_password == hashed:
+    # bcrypt salts every hash, so an unchanged secret is recognised by
+    # verifying it against the stored hash, which is then kept as is.
+    if existing and _password_matches(password, existing.hashed_password):
+        hashed = existing.hashed_password
         payload["settings"] = dict(existing.settings or base_settings)
     else:
+        hashed = _hash_password(password)
         rotated_at = datetime.now(timezone.utc)
         payload["settings"] = _update_default_user_rotation_settings(
             base_settings, rotated_at
         )
+    payload["hashed_password"] = hashed
     return payload
 
 
@@ -466,12 +676,12 @@ class DatabaseService:
         if not desired_url:
             return
 
-        current_url = str(engine.url)
-        if current_url == desired_url:
+        # Compare parsed URLs: query parameters may be reordered on parse.
+        if engine.url == make_url(desired_url):
             return
 
         engine.dispose()
-        engine = create_engine(desired_url, echo=False, future=True)
+        engine = create_engine(desired_url, echo=False, future=True, **_engine_options(desired_url))
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
         # Le changement de moteur signifie que nous pointons vers une nouvelle
@@ -492,6 +702,17 @@ class DatabaseService:
             kwargs["metadata_payload"] = kwargs.pop("metadata")
         return kwargs
 
+    @staticmethod
+    def _mirror_media_prompt(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep ``MediaItem.prompt`` in step with ``metadata["prompt"]``."""
+
+        if "metadata_payload" not in payload or "prompt" in payload:
+            return payload
+        metadata = payload["metadata_payload"]
+        payload = dict(payload)
+        payload["prompt"] = metadata.get("prompt") if isinstance(metadata, dict) else None
+        return payload
+
     def __enter__(self) -> DatabaseService:
         return self
 
@@ -503,13 +724,42 @@ class DatabaseService:
     def close(self):
         self.db.close()
 
+    @contextmanager
+    def bulk_setup(self) -> Generator[Session, None, None]:
+        """Group several ``create_*`` calls into a single transaction.
+
+        Pass the yielded session as ``session=`` to the helpers: they then
+        only flush, and everything is committed once when the block exits.
+        """
+
+        try:
+            yield self.db
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _persist(self, instance: Any, session: Optional[Session] = None) -> Any:
+        if session is not None:
+            session.add(instance)
+            session.flush()
+            return instance
+        self.db.add(instance)
+        self.db.commit()
+        self.db.refresh(instance)
+        return instance
+
     # User operations -----------------------------------------------------
-    def create_user(self, username: str, email: str, hashed_password: str) -> User:
+    def create_user(
+        self,
+        username: str,
+        email: str,
+        hashed_password: str,
+        *,
+        session: Optional[Session] = None,
+    ) -> User:
         user = User(username=username, email=email, hashed_password=hashed_password)
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        return self._persist(user, session)
 
     def get_user(self, user_id: int) -> Optional[User]:
         return self.db.query(User).filter(User.id == user_id).first()
@@ -533,13 +783,12 @@ class DatabaseService:
         return user
 
     # Persona operations --------------------------------------------------
-    def create_persona(self, user_id: int, **kwargs: Any) -> Persona:
+    def create_persona(
+        self, user_id: int, *, session: Optional[Session] = None, **kwargs: Any
+    ) -> Persona:
         payload = self._normalize_metadata(kwargs)
         persona = Persona(user_id=user_id, **payload)
-        self.db.add(persona)
-        self.db.commit()
-        self.db.refresh(persona)
-        return persona
+        return self._persist(persona, session)
 
     def get_personas(
         self,
@@ -747,13 +996,10 @@ class DatabaseService:
         return int(deleted)
 
     # Generation jobs -----------------------------------------------------
-    def create_job(self, **kwargs: Any) -> GenerationJob:
+    def create_job(self, *, session: Optional[Session] = None, **kwargs: Any) -> GenerationJob:
         payload = self._normalize_metadata(kwargs)
         job = GenerationJob(**payload)
-        self.db.add(job)
-        self.db.commit()
-        self.db.refresh(job)
-        return job
+        return self._persist(job, session)
 
     def get_job(self, job_id: str) -> Optional[GenerationJob]:
         return self.db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
@@ -890,13 +1136,10 @@ class DatabaseService:
 
         return stats
     # Media ---------------------------------------------------------------
-    def create_media_item(self, **kwargs: Any) -> MediaItem:
-        payload = self._normalize_metadata(kwargs)
+    def create_media_item(self, *, session: Optional[Session] = None, **kwargs: Any) -> MediaItem:
+        payload = self._mirror_media_prompt(self._normalize_metadata(kwargs))
         media = MediaItem(**payload)
-        self.db.add(media)
-        self.db.commit()
-        self.db.refresh(media)
-        return media
+        return self._persist(media, session)
       
     def get_media_items(
         self,
@@ -909,70 +1152,216 @@ class DatabaseService:
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
         persona_id: Optional[int] = None,
-    ) -> Tuple[List[MediaItem], int]:
-        query = self.db.query(MediaItem).filter(MediaItem.user_id == user_id)
-
-        if favorites_only:
-            query = query.filter(MediaItem.is_favorite.is_(True))
-
+        cursor: Optional[Tuple[datetime, str]] = None,
+    ) -> Tuple[List[Row], int, Optional[Tuple[datetime, str]]]:
+        """Return a page of media, the filtered total and the next page cursor.
+
+        Items are read-only rows carrying ``MEDIA_ITEM_ROW_COLUMNS`` by name;
+        use ``get_media_item`` for an instance that can be modified.
+
+        ``cursor`` is the ``(created_at, id)`` of the last item already seen;
+        when provided, the page is located with a keyset seek and ``offset``
+        is ignored. ``offset`` remains for callers that still page by
+        position, at the cost of SQLite walking every skipped row.
+        """
+        normalized_tags = list(dict.fromkeys(tag.lower() for tag in tags or () if tag))
+        fts_query = _media_fts_query(search) if search else None
+        if not search:
+            search_mode = None
+        elif fts_query is not None and self._has_sqlite_table(MEDIA_FTS_TABLE):
+            search_mode = "fts"
+        else:
+            search_mode = "scan"
+        # Without content filters the total is the user's (favourite) count.
+        counted_total = (
+            not normalized_tags
+            and search_mode is None
+            and date_from is None
+            and date_to is None
+            and persona_id is None
+            and self._has_sqlite_table(MEDIA_COUNTS_TABLE)
+        )
+        if cursor is not None:
+            page_mode = "cursor"
+        elif offset:
+            page_mode = "offset"
+        else:
+            page_mode = "first"
+
+        shape = (
+            bool(normalized_tags),
+            bool(favorites_only),
+            search_mode,
+            date_from is not None,
+            date_to is not None,
+            persona_id is not None,
+            page_mode,
+            limit is not None,
+            counted_total,
+        )
+        statements = _GET_MEDIA_SQL_CACHE.get(shape)
+        if statements is None:
+            statements = _GET_MEDIA_SQL_CACHE[shape] = self._media_list_statements(shape)
+        count_statement, page_statement = statements
+
+        params: Dict[str, Any] = {"user_id": user_id}
+        if normalized_tags:
+            # One JSON array parameter, so the tag count never reaches the
+            # SQL text or the statement cache key.
+            params["tags"] = json.dumps(normalized_tags)
+        if search_mode == "fts":
+            params["fts_query"] = fts_query
+        elif search_mode == "scan":
+            params["search_pattern"] = f"%{search.lower()}%"
+        if date_from is not None:
+            params["date_from"] = date_from
+        if date_to is not None:
+            params["date_to"] = date_to
         if persona_id is not None:
-            query = query.join(GenerationJob, MediaItem.job_id == GenerationJob.id).filter(
-                GenerationJob.persona_id == persona_id
-            )
+            params["persona_id"] = persona_id
 
-        if date_from is not None:
-            query = query.filter(MediaItem.created_at >= date_from)
+        total = self.db.execute(count_statement, params).scalar() or 0
 
-        if date_to is not None:
-            query = query.filter(MediaItem.created_at <= date_to)
+        if page_mode == "cursor":
+            params["cursor_created_at"], params["cursor_id"] = cursor
+        elif page_mode == "offset":
+            params["offset"] = offset
+        if limit is not None:
+            params["limit"] = limit
 
-        if tags:
-            normalized_tags = [tag.lower() for tag in tags if tag]
-            if normalized_tags:
-                tag_table = func.json_each(MediaItem.tags).table_valued("value").alias(
-                    "media_tags"
-                )
-                tag_exists = (
-                    select(1)
-                    .select_from(tag_table)
-                    .where(func.lower(tag_table.c.value).in_(normalized_tags))
-                    .correlate(MediaItem)
-                    .exists()
-                )
-                query = query.filter(tag_exists)
+        items = self.db.execute(page_statement, params).all()
+        next_cursor = None
+        if items and limit is not None and len(items) == limit:
+            next_cursor = (items[-1].created_at, items[-1].id)
+        return items, total, next_cursor
 
-        if search:
-            search_pattern = f"%{search.lower()}%"
-            search_conditions = []
+    @staticmethod
+    def _media_list_statements(shape: Tuple[Any, ...]) -> Tuple[Executable, Select]:
+        """Build the count and page statements for one ``get_media_items`` shape.
+
+        Every value is a named bind parameter, so the SQL text only depends on
+        ``shape``: SQLAlchemy's compiled cache and the driver's prepared
+        statement cache are both hit on repeat calls.
+        """
+
+        (
+            has_tags,
+            favorites_only,
+            search_mode,
+            has_date_from,
+            has_date_to,
+            has_persona,
+            page_mode,
+            has_limit,
+            counted_total,
+        ) = shape
+
+        statement = select(*MEDIA_ITEM_ROW_COLUMNS).where(MediaItem.user_id == bindparam("user_id"))
+
+        if favorites_only:
+            statement = statement.where(MediaItem.is_favorite.is_(True))
 
-            prompt_expr = func.lower(
-                func.coalesce(func.json_extract(MediaItem.metadata_payload, "$.prompt"), "")
+        if has_persona:
+            statement = statement.join(GenerationJob, MediaItem.job_id == GenerationJob.id).where(
+                GenerationJob.persona_id == bindparam("persona_id")
             )
-            search_conditions.append(prompt_expr.like(search_pattern))
 
-            tag_search_table = func.json_each(MediaItem.tags).table_valued("value").alias(
-                "search_tags"
+        if has_date_from:
+            statement = statement.where(MediaItem.created_at >= bindparam("date_from"))
+
+        if has_date_to:
+            statement = statement.where(MediaItem.created_at <= bindparam("date_to"))
+
+        if has_tags:
+            # One correlated EXISTS per row that stops at the first matching
+            # tag; the caller has already deduplicated the tags. NOCASE
+            # compares in place instead of building a lower() copy per tag.
+            tag_table = func.json_each(MediaItem.tags).table_valued("value").alias("media_tags")
+            requested_tags = func.json_each(bindparam("tags")).table_valued("value").alias(
+                "requested_tags"
             )
-            tag_search_exists = (
+            tag_exists = (
                 select(1)
-                .select_from(tag_search_table)
-                .where(func.lower(tag_search_table.c.value).like(search_pattern))
+                .select_from(tag_table)
+                .where(
+                    tag_table.c.value.collate("NOCASE").in_(select(requested_tags.c.value))
+                )
                 .correlate(MediaItem)
                 .exists()
             )
-            search_conditions.append(tag_search_exists)
+            statement = statement.where(tag_exists)
 
-            query = query.filter(or_(*search_conditions))
+        if search_mode == "fts":
+            fts_match = text(
+                f"SELECT rowid FROM {MEDIA_FTS_TABLE} WHERE {MEDIA_FTS_TABLE} MATCH :fts_query"
+            )
+            statement = statement.where(literal_column("media_items.rowid").in_(fts_match))
+        elif search_mode == "scan":
+            statement = statement.where(
+                DatabaseService._media_search_scan(bindparam("search_pattern"))
+            )
 
-        total = query.with_entities(func.count()).scalar() or 0
+        if counted_total:
+            count_sql = (
+                f"SELECT coalesce(sum(count), 0) FROM {MEDIA_COUNTS_TABLE} WHERE user_id = :user_id"
+            )
+            if favorites_only:
+                count_sql += " AND is_favorite = 1"
+            count_statement = text(count_sql)
+        else:
+            count_statement = statement.with_only_columns(func.count())
+
+        page_statement = statement.order_by(MediaItem.created_at.desc(), MediaItem.id.desc())
+        if page_mode == "cursor":
+            # Decomposed row-value comparison: SQLite only plans this form
+            # as a range seek on ix_media_user_created_id.
+            cursor_created_at = bindparam("cursor_created_at")
+            page_statement = page_statement.where(
+                or_(
+                    MediaItem.created_at < cursor_created_at,
+                    and_(
+                        MediaItem.created_at == cursor_created_at,
+                        MediaItem.id < bindparam("cursor_id"),
+                    ),
+                )
+            )
+        elif page_mode == "offset":
+            page_statement = page_statement.offset(bindparam("offset"))
+        if has_limit:
+            page_statement = page_statement.limit(bindparam("limit"))
 
-        ordered_query = query.order_by(MediaItem.created_at.desc())
-        if offset:
-            ordered_query = ordered_query.offset(offset)
-        if limit is not None:
-            ordered_query = ordered_query.limit(limit)
+        return count_statement, page_statement
 
-        return ordered_query.all(), total
+    def _has_sqlite_table(self, name: str) -> bool:
+        bind = self.db.get_bind()
+        if bind.dialect.name != "sqlite":
+            return False
+        known = _SQLITE_TABLES_PRESENT.setdefault(getattr(bind, "engine", bind), {})
+        if name not in known:
+            known[name] = (
+                self.db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": name},
+                ).first()
+                is not None
+            )
+        return known[name]
+
+    @staticmethod
+    def _media_search_scan(search_pattern):
+        """``LIKE`` match on the prompt and tags, for databases without FTS."""
+
+        tag_search_table = func.json_each(MediaItem.tags).table_valued("value").alias(
+            "search_tags"
+        )
+        tag_search_exists = (
+            select(1)
+            .select_from(tag_search_table)
+            .where(func.lower(tag_search_table.c.value).like(search_pattern))
+            .correlate(MediaItem)
+            .exists()
+        )
+        return or_(MediaItem.prompt.ilike(search_pattern), tag_search_exists)
 
     def get_media_item(self, media_id: str, user_id: int) -> Optional[MediaItem]:
         return (
@@ -989,7 +1378,7 @@ class DatabaseService:
         if not media:
             return None
 
-        for key, value in self._normalize_metadata(updates).items():
+        for key, value in self._mirror_media_prompt(self._normalize_metadata(updates)).items():
             setattr(media, key, value)
         if "updated_at" not in updates:
             media.updated_at = datetime.utcnow()
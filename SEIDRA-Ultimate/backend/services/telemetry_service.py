@@ -12,7 +12,7 @@ import socket
 import time
 from collections import deque
 from datetime import datetime, timedelta
-from typing import Any, Deque, Dict, List, Optional, Set
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 try:  # pragma: no cover - psutil is optional during tests
     import psutil  # type: ignore
@@ -96,6 +96,7 @@ class TelemetryService:
         interval_seconds: int = 30,
         history_size: int = 120,
         thresholds: Optional[NotificationThresholds] = None,
+        keyframe_interval: int = 10,
     ) -> None:
         self.gpu_monitor = gpu_monitor
         self.model_manager = model_manager
@@ -107,6 +108,9 @@ class TelemetryService:
         self._task: Optional[asyncio.Task] = None
         self._running = False
         self._latest_snapshot: Optional[Dict[str, Any]] = None
+        self._prev_snapshot: Optional[Dict[str, Any]] = None
+        self._broadcast_seq = 0
+        self.keyframe_interval = max(1, keyframe_interval)
         self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
         self._recent_generation_metrics: Deque[Dict[str, Any]] = deque(maxlen=history_size)
         self._active_alerts: Set[str] = set()
@@ -140,13 +144,47 @@ class TelemetryService:
             try:
                 snapshot = await self.collect_snapshot()
                 if self.websocket_manager:
-                    await self.websocket_manager.send_system_status(snapshot)
+                    data, is_delta = self._prepare_broadcast(snapshot)
+                    if data:
+                        await self.websocket_manager.send_system_status(
+                            data, seq=self._broadcast_seq, delta=is_delta
+                        )
             except asyncio.CancelledError:  # pragma: no cover - task cancelled
                 break
             except Exception as exc:  # pragma: no cover - safety net
                 print(f"⚠️ Telemetry loop error: {exc}")
             await asyncio.sleep(self.interval_seconds)
 
+    def current_keyframe(self) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Return the state clients hold after the last broadcast, with its seq.
+
+        The websocket manager sends it to clients joining the ``system``
+        channel, so they never merge deltas into an empty state.
+        """
+        if self._prev_snapshot is None:
+            return None
+        return self._prev_snapshot, self._broadcast_seq
+
+    def _prepare_broadcast(self, snapshot: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Return the payload to broadcast and whether it is a delta.
+
+        Only top-level keys that changed since the previous tick are sent, and
+        keys that disappeared are sent as ``None`` tombstones; a full snapshot
+        (keyframe) is emitted every ``keyframe_interval`` ticks as a periodic
+        safety net. Newly joined clients get ``current_keyframe`` directly
+        from the websocket manager, and clients that detect a ``seq`` gap ask
+        for it with a ``resync`` command.
+        """
+        self._broadcast_seq += 1
+        previous = self._prev_snapshot
+        self._prev_snapshot = snapshot
+        if previous is None or (self._broadcast_seq - 1) % self.keyframe_interval == 0:
+            return snapshot, False
+        diff = {key: value for key, value in snapshot.items() if previous.get(key) != value}
+        for key in previous.keys() - snapshot.keys():
+            diff[key] = None
+        return diff, True
+
     async def collect_snapshot(self) -> Dict[str, Any]:
         """Collect and cache a fresh telemetry snapshot."""
         async with self._lock:
@@ -1,23 +1,32 @@
 """
 SEIDRA Voice Cloner
 Advanced voice cloning with RVC and OpenVoice integration
+
+torch, torchaudio, librosa, soundfile and pydub are imported inside the
+methods that use them so registry-only workers never pay their import cost.
 """
 
+from __future__ import annotations
+
 import os
-import torch
-import torchaudio
+import math
+import hashlib
 import asyncio
+import functools
+import threading
 import subprocess
-from typing import Dict, List, Optional, Any, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import json
 import uuid
 import numpy as np
 from datetime import datetime
-import librosa
-import soundfile as sf
-from pydub import AudioSegment
 import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import torch
 
 try:
     # RVC imports (would be installed separately)
@@ -33,6 +42,98 @@ try:
 except ImportError:
     OPENVOICE_AVAILABLE = False
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:  # fall back to hashlib's blake2b
+    blake3 = None
+    BLAKE3_AVAILABLE = False
+
+try:
+    import numexpr as ne
+    NUMEXPR_AVAILABLE = True
+except ImportError:  # plain NumPy fallback
+    ne = None
+    NUMEXPR_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _write_json_atomic(path: Path, data: Any, indent: bool = False) -> None:
+    """Serialize ``data`` to a temp file and atomically swap it into place"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        payload = json.dumps(data, indent=2 if indent else None).encode("utf-8")
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Any:
+    raw = path.read_bytes()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+_normalize_preemphasis = None
+
+
+def _get_normalize_preemphasis():
+    """Script the fused normalize + pre-emphasis kernel on first use"""
+    global _normalize_preemphasis
+    if _normalize_preemphasis is None:
+        import torch
+        import torch.nn.functional as F
+
+        def normalize_preemphasis(audio: torch.Tensor, coef: float = 0.97) -> torch.Tensor:
+            """Peak-normalize then apply a first-order pre-emphasis filter"""
+            audio = audio / torch.clamp(audio.abs().max(), min=1e-8)
+            return audio - coef * F.pad(audio[..., :-1], (1, 0))
+
+        _normalize_preemphasis = torch.jit.script(normalize_preemphasis)
+    return _normalize_preemphasis
+
+
+_numba_normalize_preemphasis = None
+_NUMBA_CHECKED = False
+
+
+def _get_numba_normalize_preemphasis():
+    """JIT the CPU normalize + pre-emphasis loop with Numba, or return None"""
+    global _numba_normalize_preemphasis, _NUMBA_CHECKED
+    if not _NUMBA_CHECKED:
+        _NUMBA_CHECKED = True
+        try:
+            from numba import njit
+        except ImportError:  # Numba is optional; the TorchScript kernel is used instead
+            return None
+
+        @njit(cache=True, fastmath=True)
+        def normalize_preemphasis(x, coef=0.97):
+            if x.size == 0:
+                return np.empty_like(x)
+            peak = 1e-8
+            for i in range(x.size):
+                value = abs(x[i])
+                if value > peak:
+                    peak = value
+            y = np.empty_like(x)
+            y[0] = x[0] / peak
+            for i in range(1, x.size):
+                y[i] = (x[i] - coef * x[i - 1]) / peak
+            return y
+
+        _numba_normalize_preemphasis = normalize_preemphasis
+    return _numba_normalize_preemphasis
+
+
 class VoiceCloner:
     """Advanced voice cloning system with multiple backends"""
     
@@ -74,10 +175,80 @@ class VoiceCloner:
             "calm": {"pitch_shift": -1, "speed": 0.9, "energy": 0.7}
         }
         
+        # Precompute the per-preset transforms used by post-processing
+        for preset in self.emotion_presets.values():
+            preset["needs_speed"] = abs(preset["speed"] - 1.0) > 1e-3
+            preset["needs_gain"] = abs(preset["energy"] - 1.0) > 1e-3
+        
+        # Feature extraction runs on GPU when available (resolved lazily)
+        self._device = None
+        self.feature_sample_rate = 22050
+        self.feature_n_fft = 2048
+        self.feature_hop_length = 512
+        self.pitch_fmin = 50.0
+        self.pitch_fmax = 500.0
+        self._feature_transforms = None
+        self._eager_feature_transforms = None
+        
+        # Bound concurrent decodes so large sample sets do not exhaust RAM
+        self._audio_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        
+        # One long-lived pool for blocking audio work, plus resamplers cached
+        # per (source rate, device) so filter kernels are designed only once
+        self._executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix="voice-cloner"
+        )
+        self._resamplers: Dict[Tuple[int, str], Any] = {}
+        self._resamplers_lock = threading.Lock()
+        
+        # In-process encoder settings per output format (PyAV)
+        self._encoders: Dict[str, Dict[str, Any]] = {
+            "mp3": {"container": "mp3", "codec": "libmp3lame", "bit_rate": 192_000},
+            # libvorbis rejects its 128k default for 22.05 kHz mono
+            "ogg": {"container": "ogg", "codec": "libvorbis", "bit_rate": 64_000}
+        }
+        
+        # Validation/preprocessing/feature results keyed by sample content hash
+        self.sample_cache_path = self.voice_samples_dir / ".cache.json"
+        self.sample_cache_size = 512
+        self._sample_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._digest_index: Dict[Tuple[str, int, int], str] = {}
+        
         # Initialize backends
         self.rvc_model = None
         self.openvoice_model = None
     
+    @property
+    def device(self) -> "torch.device":
+        """Compute device, resolved on first use so torch is only imported when needed"""
+        if self._device is None:
+            import torch
+            self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        return self._device
+    
+    async def _run_blocking(self, func, *args):
+        """Run blocking audio work on the shared executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    def _resample(self, waveform: "torch.Tensor", orig_sr: int) -> "torch.Tensor":
+        """Resample to the feature rate with a cached Resample module"""
+        import torchaudio
+        
+        key = (orig_sr, str(waveform.device))
+        resampler = self._resamplers.get(key)
+        if resampler is None:
+            with self._resamplers_lock:
+                resampler = self._resamplers.get(key)
+                if resampler is None:
+                    resampler = torchaudio.transforms.Resample(
+                        orig_sr,
+                        self.feature_sample_rate,
+                        resampling_method="sinc_interp_kaiser"
+                    ).to(waveform.device)
+                    self._resamplers[key] = resampler
+        return resampler(waveform)
+    
     async def initialize(self):
         """Initialize voice cloning backends"""
         print("🎙️ Initializing Voice Cloner...")
@@ -97,6 +268,7 @@ class VoiceCloner:
             
             # Load existing voice models
             await self._load_voice_registry()
+            await self._load_sample_cache()
             
             print("✅ Voice Cloner initialized")
             
@@ -132,26 +304,29 @@ class VoiceCloner:
         try:
             print(f"🎯 Training voice model: {voice_name}")
             
-            # Validate audio samples
-            validated_samples = []
+            # Validate audio samples concurrently
+            existing_samples = []
             for sample_path in audio_samples:
                 if os.path.exists(sample_path):
-                    # Validate audio quality
-                    if await self._validate_audio_sample(sample_path):
-                        validated_samples.append(sample_path)
-                    else:
-                        print(f"⚠️ Invalid audio sample: {sample_path}")
+                    existing_samples.append(sample_path)
                 else:
                     print(f"⚠️ Audio sample not found: {sample_path}")
             
+            validation_results = await asyncio.gather(
+                *[self._validate_audio_sample(sample_path) for sample_path in existing_samples]
+            )
+            validated_samples = []
+            for sample_path, is_valid in zip(existing_samples, validation_results):
+                if is_valid:
+                    validated_samples.append(sample_path)
+                else:
+                    print(f"⚠️ Invalid audio sample: {sample_path}")
+            
             if len(validated_samples) < 3:
                 raise ValueError("At least 3 valid audio samples required for training")
             
             # Preprocess audio samples
-            processed_samples = []
-            for sample_path in validated_samples:
-                processed_path = await self._preprocess_audio(sample_path)
-                processed_samples.append(processed_path)
+            processed_samples = await self._preprocess_audio_batch(validated_samples)
             
             # Train model based on available backend
             model_id = str(uuid.uuid4())
@@ -263,62 +438,190 @@ class VoiceCloner:
             print(f"❌ Voice cloning failed: {e}")
             raise
     
+    def _digest(self, audio_path: str) -> str:
+        """Content hash of a sample, memoized on (path, mtime, size)"""
+        
+        stat = os.stat(audio_path)
+        key = (os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digest_index.get(key)
+        if digest is None:
+            data = Path(audio_path).read_bytes()
+            if BLAKE3_AVAILABLE:
+                digest = blake3.blake3(data).hexdigest()
+            else:
+                digest = hashlib.blake2b(data, digest_size=32).hexdigest()
+            self._digest_index[key] = digest
+        return digest
+    
+    def _get_cached_sample(self, digest: str) -> Dict[str, Any]:
+        """Return (creating if needed) the LRU cache entry for a sample digest"""
+        
+        entry = self._sample_cache.get(digest)
+        if entry is None:
+            entry = {}
+            self._sample_cache[digest] = entry
+            while len(self._sample_cache) > self.sample_cache_size:
+                self._sample_cache.popitem(last=False)
+        else:
+            self._sample_cache.move_to_end(digest)
+        return entry
+    
+    async def _load_sample_cache(self):
+        """Load the persisted sample cache"""
+        
+        if self.sample_cache_path.exists():
+            try:
+                cached = await self._run_blocking(_read_json, self.sample_cache_path)
+                self._sample_cache = OrderedDict(cached)
+            except Exception as e:
+                print(f"⚠️ Failed to load voice sample cache: {e}")
+    
+    async def _save_sample_cache(self):
+        """Persist the sample cache"""
+        
+        try:
+            await self._run_blocking(
+                _write_json_atomic, self.sample_cache_path, dict(self._sample_cache)
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to save voice sample cache: {e}")
+    
     async def _validate_audio_sample(self, audio_path: str) -> bool:
         """Validate audio sample quality"""
         
         try:
+            async with self._audio_semaphore:
+                digest = await self._run_blocking(self._digest, audio_path)
+                entry = self._get_cached_sample(digest)
+                if "valid" in entry:
+                    return entry["valid"]
+                is_valid = await self._run_blocking(self._validate_sync, audio_path)
+                entry["valid"] = is_valid
+                return is_valid
+        except Exception as e:
+            print(f"⚠️ Audio validation failed: {e}")
+            return False
+    
+    def _validate_sync(self, audio_path: str) -> bool:
+        """Blocking validation core, run in a worker thread"""
+        import librosa
+        import soundfile as sf
+        
+        # Read duration and sample rate from the header when possible so
+        # out-of-range files are rejected without decoding them
+        try:
+            info = sf.info(audio_path)
+            duration, sr = info.frames / info.samplerate, info.samplerate
+        except sf.LibsndfileError:
+            duration = sr = None
+        
+        if duration is None:
             # Load audio
             audio, sr = librosa.load(audio_path, sr=None)
-            
-            # Check duration (should be 5-60 seconds)
             duration = len(audio) / sr
-            if duration < 5 or duration > 60:
-                return False
-            
-            # Check sample rate (should be >= 16kHz)
-            if sr < 16000:
-                return False
-            
-            # Check for silence
-            rms = librosa.feature.rms(y=audio)[0]
-            if np.mean(rms) < 0.01:  # Too quiet
-                return False
-            
-            # Check for clipping
-            if np.max(np.abs(audio)) > 0.99:
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"⚠️ Audio validation failed: {e}")
+        else:
+            audio = None
+        
+        # Check duration (should be 5-60 seconds)
+        if duration < 5 or duration > 60:
             return False
+        
+        # Check sample rate (should be >= 16kHz)
+        if sr < 16000:
+            return False
+        
+        if audio is None:
+            audio, _ = librosa.load(audio_path, sr=None)
+        
+        # Silence and clipping checks from one aggregate pass: BLAS dot for the
+        # energy and a single abs-max for the peak
+        peak = float(np.abs(audio).max())
+        rms = math.sqrt(float(np.dot(audio, audio)) / len(audio))
+        return rms >= 0.01 and peak <= 0.99
     
     async def _preprocess_audio(self, audio_path: str) -> str:
         """Preprocess audio sample for training"""
         
+        processed = await self._preprocess_audio_batch([audio_path])
+        return processed[0]
+    
+    async def _preprocess_audio_batch(self, audio_paths: List[str]) -> List[str]:
+        """Preprocess audio samples for training, keeping the original path on failure"""
+        
+        async def preprocess(audio_path: str) -> str:
+            try:
+                async with self._audio_semaphore:
+                    digest = await self._run_blocking(self._digest, audio_path)
+                    entry = self._get_cached_sample(digest)
+                    cached_path = entry.get("preprocessed_path")
+                    if cached_path and os.path.exists(cached_path):
+                        return cached_path
+                    processed_path = await self._run_blocking(self._preprocess_sync, audio_path)
+                    entry["preprocessed_path"] = processed_path
+                    return processed_path
+            except Exception as e:
+                print(f"⚠️ Audio preprocessing failed: {e}")
+                return audio_path
+        
+        return list(await asyncio.gather(*[preprocess(path) for path in audio_paths]))
+    
+    def _read_waveform(self, audio_path: str) -> Tuple["torch.Tensor", int]:
+        """Decode a sample as a contiguous mono float32 tensor"""
+        import soundfile as sf
+        import torch
+        
         try:
-            # Load audio
-            audio, sr = librosa.load(audio_path, sr=22050)  # Standardize sample rate
-            
-            # Normalize audio
-            audio = librosa.util.normalize(audio)
-            
-            # Remove silence
-            audio, _ = librosa.effects.trim(audio, top_db=20)
-            
-            # Apply noise reduction (basic)
-            audio = librosa.effects.preemphasis(audio)
-            
-            # Save preprocessed audio
-            output_path = self.voice_samples_dir / f"preprocessed_{uuid.uuid4().hex}.wav"
-            sf.write(str(output_path), audio, sr)
-            
-            return str(output_path)
-            
-        except Exception as e:
-            print(f"⚠️ Audio preprocessing failed: {e}")
-            return audio_path
+            audio, sr = sf.read(audio_path, dtype="float32", always_2d=True)
+        except sf.LibsndfileError:
+            import torchaudio
+            waveform, sr = torchaudio.load(audio_path)
+            return waveform.mean(dim=0), sr
+        audio = np.ascontiguousarray(audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0])
+        return torch.from_numpy(audio), sr
+    
+    def _to_device(self, tensor: "torch.Tensor") -> "torch.Tensor":
+        """Move a CPU tensor to the compute device through pinned memory"""
+        
+        if self.device.type != "cuda":
+            return tensor
+        return tensor.pin_memory().to(self.device, non_blocking=True)
+    
+    def _preprocess_sync(self, audio_path: str) -> str:
+        """Resample, trim, normalize and pre-emphasize a sample on the compute device"""
+        import torch
+        import torchaudio
+        
+        waveform, sr = self._read_waveform(audio_path)
+        waveform = self._to_device(waveform)
+        
+        # Standardize sample rate
+        if sr != self.feature_sample_rate:
+            waveform = self._resample(waveform, sr)
+        
+        # Remove leading and trailing silence (vad only trims the front)
+        waveform = torchaudio.functional.vad(waveform, self.feature_sample_rate)
+        waveform = torchaudio.functional.vad(waveform.flip(-1), self.feature_sample_rate).flip(-1)
+        if waveform.numel() == 0:
+            raise ValueError(f"No voice activity detected in {audio_path}")
+        
+        # Normalize + basic noise reduction in one fused kernel: a Numba loop on
+        # CPU (when installed), TorchScript otherwise
+        cpu_kernel = _get_numba_normalize_preemphasis() if waveform.device.type == "cpu" else None
+        if cpu_kernel is not None:
+            waveform = torch.from_numpy(cpu_kernel(np.ascontiguousarray(waveform.numpy())))
+        else:
+            waveform = _get_normalize_preemphasis()(waveform)
+        
+        # Save preprocessed audio
+        output_path = self.voice_samples_dir / f"preprocessed_{uuid.uuid4().hex}.wav"
+        torchaudio.save(
+            str(output_path),
+            waveform.unsqueeze(0).cpu(),
+            self.feature_sample_rate,
+            bits_per_sample=16
+        )
+        
+        return str(output_path)
     
     async def _train_rvc_model(self, model_id: str, voice_name: str, 
                               samples: List[str], steps: int) -> Path:
@@ -341,8 +644,7 @@ class VoiceCloner:
             "training_steps": steps
         }
         
-        with open(model_path, 'w') as f:
-            json.dump(model_data, f)
+        _write_json_atomic(model_path, model_data)
         
         return model_path
     
@@ -366,8 +668,7 @@ class VoiceCloner:
             "training_steps": steps
         }
         
-        with open(model_path, 'w') as f:
-            json.dump(model_data, f)
+        _write_json_atomic(model_path, model_data)
         
         return model_path
     
@@ -385,13 +686,12 @@ class VoiceCloner:
         }
         
         profile_path = self.models_dir / f"profile_{model_id}.json"
-        with open(profile_path, 'w') as f:
-            json.dump(profile_data, f)
+        _write_json_atomic(profile_path, profile_data)
         
         return profile_path
     
     async def _extract_voice_characteristics(self, samples: List[str]) -> Dict[str, Any]:
-        """Extract voice characteristics from audio samples"""
+        """Extract voice characteristics from audio samples in a single batched pass"""
         
         characteristics = {
             "pitch_mean": [],
@@ -401,29 +701,54 @@ class VoiceCloner:
             "mfcc": []
         }
         
-        for sample_path in samples:
+        # Features of previously seen files are served from the content-hash cache
+        digests = await asyncio.gather(
+            *[self._run_blocking(self._digest, path) for path in samples],
+            return_exceptions=True
+        )
+        sample_features = []
+        pending = []
+        for sample_path, digest in zip(samples, digests):
+            if isinstance(digest, Exception):
+                print(f"⚠️ Failed to extract characteristics from {sample_path}: {digest}")
+                continue
+            entry = self._get_cached_sample(digest)
+            if "characteristics" in entry:
+                sample_features.append(entry["characteristics"])
+            else:
+                pending.append((sample_path, entry))
+        
+        # Decode every remaining sample concurrently, then run the feature
+        # extractors once over a padded (B, T) batch instead of N sequential
+        # CPU FFT passes
+        loaded = await asyncio.gather(
+            *[self._run_blocking(self._load_feature_waveform, path) for path, _ in pending],
+            return_exceptions=True
+        )
+        waveforms = []
+        entries = []
+        for (sample_path, entry), result in zip(pending, loaded):
+            if isinstance(result, Exception):
+                print(f"⚠️ Failed to extract characteristics from {sample_path}: {result}")
+            else:
+                waveforms.append(result)
+                entries.append(entry)
+        
+        if waveforms:
             try:
-                audio, sr = librosa.load(sample_path, sr=22050)
-                
-                # Extract pitch
-                pitches, magnitudes = librosa.piptrack(y=audio, sr=sr)
-                pitch_values = pitches[magnitudes > np.percentile(magnitudes, 85)]
-                pitch_values = pitch_values[pitch_values > 0]
-                
-                if len(pitch_values) > 0:
-                    characteristics["pitch_mean"].append(np.mean(pitch_values))
-                    characteristics["pitch_std"].append(np.std(pitch_values))
-                
-                # Extract spectral centroid
-                spectral_centroid = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
-                characteristics["spectral_centroid"].append(np.mean(spectral_centroid))
-                
-                # Extract MFCC
-                mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=13)
-                characteristics["mfcc"].append(np.mean(mfcc, axis=1).tolist())
-                
+                computed = await self._run_blocking(self._compute_batch_features, waveforms)
+                for entry, features in zip(entries, computed):
+                    entry["characteristics"] = features
+                sample_features.extend(computed)
             except Exception as e:
-                print(f"⚠️ Failed to extract characteristics from {sample_path}: {e}")
+                print(f"⚠️ Failed to extract characteristics: {e}")
+        
+        for features in sample_features:
+            characteristics["mfcc"].append(features["mfcc"])
+            characteristics["spectral_centroid"].append(features["spectral_centroid"])
+            if features["pitch_mean"] is not None:
+                characteristics["pitch_mean"].append(features["pitch_mean"])
+                characteristics["pitch_std"].append(features["pitch_std"])
         
         # Average characteristics
         for key in characteristics:
@@ -435,9 +760,117 @@ class VoiceCloner:
         
         return characteristics
     
+    def _load_feature_waveform(self, sample_path: str) -> "torch.Tensor":
+        """Decode a sample as a mono 1-D tensor at the feature sample rate"""
+        waveform, sr = self._read_waveform(sample_path)
+        if sr != self.feature_sample_rate:
+            waveform = self._resample(waveform, sr)
+        return waveform
+    
+    def _get_feature_transforms(self) -> Tuple["torch.nn.Module", "torch.nn.Module"]:
+        """Build the MFCC / spectral centroid modules once and keep them on device
+
+        On CUDA the modules are wrapped with ``torch.compile`` so the STFT,
+        mel filterbank and DCT are fused; ``_eager_feature_transforms`` keeps
+        the plain modules as a fallback if compilation fails at runtime.
+        """
+        import torch
+        import torchaudio
+        
+        if self._feature_transforms is None:
+            mfcc = torchaudio.transforms.MFCC(
+                sample_rate=self.feature_sample_rate,
+                n_mfcc=13,
+                melkwargs={"n_fft": self.feature_n_fft, "hop_length": self.feature_hop_length, "n_mels": 128}
+            ).to(self.device)
+            centroid = torchaudio.transforms.SpectralCentroid(
+                self.feature_sample_rate,
+                n_fft=self.feature_n_fft,
+                hop_length=self.feature_hop_length
+            ).to(self.device)
+            self._eager_feature_transforms = (mfcc, centroid)
+            self._feature_transforms = self._eager_feature_transforms
+            if self.device.type == "cuda":
+                try:
+                    self._feature_transforms = (
+                        torch.compile(mfcc, mode="reduce-overhead", dynamic=True),
+                        torch.compile(centroid, mode="reduce-overhead", dynamic=True)
+                    )
+                except Exception as e:
+                    print(f"⚠️ torch.compile unavailable for voice features: {e}")
+        return self._feature_transforms
+    
+    def _compute_batch_features(self, waveforms: List["torch.Tensor"]) -> List[Dict[str, Any]]:
+        """Compute per-sample pitch, spectral centroid and MFCC statistics for a batch"""
+        import torch
+        import torchaudio
+        
+        mfcc_transform, centroid_transform = self._get_feature_transforms()
+        lengths = [int(w.shape[-1]) for w in waveforms]
+        batch = torch.nn.utils.rnn.pad_sequence(waveforms, batch_first=True)
+        batch = self._to_device(batch)
+        
+        features: List[Dict[str, Any]] = []
+        
+        # MFCC's dB conversion clamps to ``top_db`` below the maximum over its
+        # last three dims; a channel dim keeps that per sample, not per batch
+        channels = batch.unsqueeze(1)
+        
+        with torch.inference_mode():
+            try:
+                mfcc = mfcc_transform(channels).squeeze(1)  # (B, n_mfcc, frames)
+                centroid = centroid_transform(batch)  # (B, frames)
+            except Exception as e:
+                if self._feature_transforms is self._eager_feature_transforms:
+                    raise
+                print(f"⚠️ Compiled voice features failed, using eager mode: {e}")
+                self._feature_transforms = self._eager_feature_transforms
+                mfcc_transform, centroid_transform = self._feature_transforms
+                mfcc = mfcc_transform(channels).squeeze(1)
+                centroid = centroid_transform(batch)
+            pitch = torchaudio.functional.detect_pitch_frequency(
+                batch,
+                self.feature_sample_rate,
+                freq_low=self.pitch_fmin,
+                freq_high=self.pitch_fmax
+            )
+            
+            # Single f0 track per sample: mask padding and out-of-band frames
+            # as NaN and reduce the whole batch at once
+            pitch_lengths = torch.tensor(
+                [max(1, round(pitch.shape[-1] * length / batch.shape[-1])) for length in lengths],
+                device=pitch.device
+            )
+            frame_index = torch.arange(pitch.shape[-1], device=pitch.device)
+            voiced = (
+                (frame_index.unsqueeze(0) < pitch_lengths.unsqueeze(1))
+                & (pitch >= self.pitch_fmin)
+                & (pitch <= self.pitch_fmax)
+            )
+            f0 = torch.where(voiced, pitch, torch.full_like(pitch, float("nan")))
+            pitch_mean = torch.nanmean(f0, dim=-1)
+            pitch_std = torch.nanmean((f0 - pitch_mean.unsqueeze(1)) ** 2, dim=-1).sqrt()
+            pitch_mean = pitch_mean.cpu().tolist()
+            pitch_std = pitch_std.cpu().tolist()
+        
+        # Padding frames would bias the means towards silence, so only average
+        # over the frames covered by each original sample
+        for index, length in enumerate(lengths):
+            frames = length // self.feature_hop_length + 1
+            voiced_sample = not np.isnan(pitch_mean[index])
+            features.append({
+                "mfcc": mfcc[index, :, :frames].mean(dim=-1).cpu().tolist(),
+                "spectral_centroid": float(torch.nan_to_num(centroid[index, :frames]).mean().cpu()),
+                "pitch_mean": pitch_mean[index] if voiced_sample else None,
+                "pitch_std": pitch_std[index] if voiced_sample else None
+            })
+        
+        return features
+    
     async def _clone_with_tts(self, voice_model: Dict[str, Any], text: str,
                             emotion_params: Dict[str, Any], language: str) -> str:
         """Clone voice using TTS with voice profile (fallback method)"""
+        import soundfile as sf
         
         try:
             # Use system TTS as fallback
@@ -449,7 +882,7 @@ class VoiceCloner:
             # Generate simple tone based on voice characteristics
             duration = len(text.split()) * 0.5  # Rough estimate
             sample_rate = 22050
-            t = np.linspace(0, duration, int(sample_rate * duration))
+            t = np.linspace(0, duration, int(sample_rate * duration), dtype=np.float32)
             
             # Use voice characteristics if available
             if "characteristics" in voice_model:
@@ -461,12 +894,18 @@ class VoiceCloner:
             # Apply emotion
             freq = base_freq * (1 + emotion_params["pitch_shift"] * 0.1)
             
-            # Generate audio (placeholder)
-            audio = 0.3 * np.sin(2 * np.pi * freq * t)
-            audio = audio * np.exp(-t * 0.5)  # Fade out
+            # Generate audio (placeholder): sine with exponential fade out,
+            # evaluated in a single fused float32 pass
+            w = np.float32(2 * np.pi * freq)
+            if NUMEXPR_AVAILABLE:
+                audio = ne.evaluate("0.3 * sin(w * t) * exp(-0.5 * t)")
+            else:
+                audio = np.sin(w * t)
+                audio *= np.exp(np.float32(-0.5) * t)
+                audio *= np.float32(0.3)
             
             # Save audio
-            sf.write(str(output_path), audio, sample_rate)
+            sf.write(str(output_path), audio, sample_rate, subtype="PCM_16")
             
             return str(output_path)
             
@@ -479,42 +918,136 @@ class VoiceCloner:
         """Post-process cloned audio"""
         
         try:
-            # Load audio
-            audio = AudioSegment.from_wav(audio_path)
-            
-            # Apply emotion parameters
-            if emotion_params["speed"] != 1.0:
-                # Change speed
-                audio = audio.speedup(playback_speed=emotion_params["speed"])
-            
-            if emotion_params["energy"] != 1.0:
-                # Adjust volume
-                volume_change = 20 * np.log10(emotion_params["energy"])
-                audio = audio + volume_change
-            
-            # Convert to desired format
+            return await self._run_blocking(
+                self._post_process_sync, audio_path, emotion_params, output_format
+            )
+        except Exception as e:
+            print(f"⚠️ Audio post-processing failed: {e}")
+            return audio_path
+    
+    def _post_process_sync(self, audio_path: str, emotion_params: Dict[str, Any],
+                           output_format: str) -> str:
+        """Apply emotion speed/energy on the waveform tensor and encode the result"""
+        import soundfile as sf
+        import torchaudio
+        
+        # WAV in, WAV out without a speed change: apply gain on the PCM samples
+        # in place rather than decoding and re-encoding the whole file
+        if output_format == "wav" and not emotion_params["needs_speed"]:
+            if emotion_params["needs_gain"]:
+                audio, sr = sf.read(audio_path, dtype="float32")
+                audio *= emotion_params["energy"]
+                np.clip(audio, -1.0, 1.0, out=audio)
+                sf.write(audio_path, audio, sr, subtype="PCM_16")
+            return audio_path
+        
+        # Load audio
+        waveform, sr = torchaudio.load(audio_path)
+        
+        # Apply emotion parameters
+        if emotion_params["needs_speed"]:
+            # Change speed (phase vocoder keeps the pitch unchanged)
+            waveform = self._time_stretch(waveform, emotion_params["speed"])
+        
+        if emotion_params["needs_gain"]:
+            # Adjust volume
+            waveform = (waveform * emotion_params["energy"]).clamp(-1.0, 1.0)
+        
+        # Convert to desired format
+        if output_format in self._encoders:
             output_path = Path(audio_path).with_suffix(f".{output_format}")
-            
+            if not self._encode_in_process(waveform, sr, output_path, output_format):
+                self._encode_with_pydub(waveform, sr, output_path, output_format)
+        else:
+            # wav, and default to wav for unknown formats (torchaudio would
+            # otherwise infer the container from the suffix)
+            output_path = Path(audio_path).with_suffix(".wav")
+            torchaudio.save(str(output_path), waveform, sr, format="wav", bits_per_sample=16)
+        
+        return str(output_path)
+    
+    def _encode_in_process(self, waveform: "torch.Tensor", sr: int, output_path: Path,
+                           output_format: str) -> bool:
+        """Encode with PyAV in-process; returns False when PyAV is unavailable"""
+        
+        try:
+            import av
+        except ImportError:
+            return False
+        
+        encoder = self._encoders[output_format]
+        # Planar float32 mono, shape (channels, samples)
+        samples = np.ascontiguousarray(waveform.mean(dim=0, keepdim=True).numpy(), dtype=np.float32)
+        frame = av.AudioFrame.from_ndarray(samples, format="fltp", layout="mono")
+        frame.sample_rate = sr
+        
+        with av.open(str(output_path), mode="w", format=encoder["container"]) as container:
+            stream = container.add_stream(encoder["codec"], rate=sr, layout="mono")
+            if encoder["bit_rate"]:
+                stream.bit_rate = encoder["bit_rate"]
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        return True
+    
+    def _encode_with_pydub(self, waveform: "torch.Tensor", sr: int, output_path: Path,
+                           output_format: str) -> None:
+        """Encode through pydub/ffmpeg (fallback when PyAV is not installed)"""
+        import torchaudio
+        from pydub import AudioSegment
+        
+        processed_path = output_path.with_name(f"{output_path.stem}_processed.wav")
+        torchaudio.save(str(processed_path), waveform, sr, bits_per_sample=16)
+        try:
+            audio = AudioSegment.from_wav(str(processed_path))
             if output_format == "mp3":
                 audio.export(str(output_path), format="mp3", bitrate="192k")
-            elif output_format == "wav":
-                audio.export(str(output_path), format="wav")
-            elif output_format == "ogg":
-                audio.export(str(output_path), format="ogg")
             else:
-                # Default to wav
-                audio.export(str(output_path), format="wav")
-            
-            return str(output_path)
-            
-        except Exception as e:
-            print(f"⚠️ Audio post-processing failed: {e}")
-            return audio_path
+                audio.export(str(output_path), format=output_format)
+        finally:
+            processed_path.unlink(missing_ok=True)
+    
+    def _time_stretch(self, waveform: "torch.Tensor", rate: float) -> "torch.Tensor":
+        """Change playback speed with an STFT phase vocoder"""
+        import torch
+        import torchaudio
+        
+        n_fft = 1024
+        hop_length = n_fft // 4
+        window = torch.hann_window(n_fft, device=waveform.device)
+        spec = torch.stft(
+            waveform, n_fft=n_fft, hop_length=hop_length, window=window, return_complex=True
+        )
+        phase_advance = torch.linspace(
+            0, math.pi * hop_length, spec.shape[-2], device=waveform.device
+        )[..., None]
+        stretched = torchaudio.functional.phase_vocoder(spec, rate, phase_advance)
+        return torch.istft(
+            stretched,
+            n_fft=n_fft,
+            hop_length=hop_length,
+            window=window,
+            length=int(round(waveform.shape[-1] / rate))
+        )
     
     async def _get_audio_duration(self, audio_path: str) -> float:
         """Get audio duration in seconds"""
+        import soundfile as sf
+        
+        try:
+            # Header-only read; no PCM decode
+            info = sf.info(audio_path)
+            return info.frames / info.samplerate
+        except sf.LibsndfileError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Failed to get audio duration: {e}")
+            return 0.0
         
         try:
+            # Formats libsndfile cannot parse (e.g. mp3 on older builds)
+            from pydub import AudioSegment
             audio = AudioSegment.from_file(audio_path)
             return len(audio) / 1000.0  # Convert to seconds
         except Exception as e:
@@ -534,8 +1067,7 @@ class VoiceCloner:
         registry_path = self.models_dir / "voice_registry.json"
         if registry_path.exists():
             try:
-                with open(registry_path, 'r') as f:
-                    self.voice_models = json.load(f)
+                self.voice_models = _read_json(registry_path)
                 print(f"✅ Loaded {len(self.voice_models)} voice models")
             except Exception as e:
                 print(f"⚠️ Failed to load voice registry: {e}")
@@ -545,8 +1077,7 @@ class VoiceCloner:
         
         registry_path = self.models_dir / "voice_registry.json"
         try:
-            with open(registry_path, 'w') as f:
-                json.dump(self.voice_models, f, indent=2)
+            _write_json_atomic(registry_path, self.voice_models, indent=True)
         except Exception as e:
             print(f"⚠️ Failed to save voice registry: {e}")
     
@@ -591,4 +1122,9 @@ class VoiceCloner:
             del self.openvoice_model
             self.openvoice_model = None
         
+        await self._save_sample_cache()
+        
+        self._executor.shutdown(wait=False)
+        self._resamplers.clear()
+        
         print("✅ Voice Cloner cleaned up")
\ No newline at end of file
@@ -4,32 +4,237 @@ from __future__ import annotations
 
 import asyncio
 import json
-from collections import defaultdict
+import time
+import zlib
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Set
+from datetime import datetime, timedelta, timezone
+from typing import (
+    AbstractSet,
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from fastapi import WebSocket
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _encode(message: Any) -> str:
+    """Serialise an outbound message (or a JSON fragment) for a text frame."""
+
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(
+                message,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                default=str,
+            ).decode()
+        except TypeError:
+            # orjson still rejects a few values ``default`` cannot rescue
+            # (e.g. integers wider than 64 bits); the stdlib path accepts them.
+            pass
+    return json.dumps(message, default=str)
+
+
+_PING_FRAME = '{"type":"ping"}'
+_PONG_TEMPLATE = '{"type":"pong","timestamp":"%s"}'
+# Progress events have a fixed schema, so only their values are encoded.
+_PROGRESS_TEMPLATE = (
+    '{"type":"generation_progress","jobId":%s,"progress":%s,"status":%s,'
+    '"message":%s,"metadata":%s,"timestamp":"%s"}'
+)
+_JOBS_CHANNELS = frozenset({"jobs"})
+_SYSTEM_CHANNEL = "system"
+
+SystemStatusProvider = Callable[[], Optional[Tuple[Dict[str, Any], int]]]
+
+_last_timestamp_ms = -1
+_last_timestamp = ""
+
+
+def _now_iso() -> str:
+    """Return the current UTC time as ISO 8601, cached per millisecond."""
+
+    global _last_timestamp_ms, _last_timestamp
+    now = time.time()
+    now_ms = int(now * 1000)
+    if now_ms != _last_timestamp_ms:
+        _last_timestamp = (
+            datetime.fromtimestamp(now, tz=timezone.utc)
+            .replace(tzinfo=None)
+            .isoformat(timespec="milliseconds")
+        )
+        _last_timestamp_ms = now_ms
+    return _last_timestamp
+
 
 @dataclass
 class ConnectionState:
     websocket: WebSocket
     user_id: Optional[int]
-    channels: Set[str] = field(default_factory=set)
+    client_id: str = ""
+    handle: int = 0
+    channels: AbstractSet[str] = field(default_factory=frozenset)
     connected_at: datetime = field(default_factory=datetime.utcnow)
     last_seen: datetime = field(default_factory=datetime.utcnow)
+    # Each entry pairs a frame with whether it may be dropped on overflow.
+    out_queue: asyncio.Queue[Tuple[Union[str, bytes], bool]] = field(default_factory=asyncio.Queue)
+    writer_task: Optional[asyncio.Task] = None
+    sorted_channels_cache: Optional[Tuple[str, ...]] = None
+
+    def sorted_channels(self) -> Tuple[str, ...]:
+        if self.sorted_channels_cache is None:
+            self.sorted_channels_cache = tuple(sorted(self.channels))
+        return self.sorted_channels_cache
 
 
 class WebSocketManager:
-    """Manage authenticated realtime connections and channel subscriptions."""
+    """Manage authenticated realtime connections and channel subscriptions.
+
+    Every connection owns a bounded outbound queue drained by a dedicated
+    writer task, so producers never await a socket and a slow client only
+    stalls its own queue. When the queue is full the oldest coalescible
+    frame (progress, system status, ping) is dropped; if only critical
+    frames are queued, a new coalescible frame is skipped and a new critical
+    one disconnects the slow consumer instead of losing it silently.
+    Messages already queued when the writer wakes up (up to
+    ``max_batch_size``) are coalesced into a single JSON array frame.
+
+    Large events fanned out to at least ``compress_min_recipients`` clients
+    are zlib-compressed once and sent as binary frames, instead of letting
+    permessage-deflate compress the same payload per connection.
+
+    Once started, a reaper task pings connections that have been silent for
+    ``ping_after`` seconds and drops those silent for ``heartbeat_timeout``,
+    so dead sockets leave the indexes before the next fan-out.
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        queue_size: int = 256,
+        max_batch_size: int = 128,
+        compress_min_recipients: int = 8,
+        compress_min_bytes: int = 1024,
+        heartbeat_timeout: float = 60.0,
+        ping_after: float = 25.0,
+        reap_interval: float = 10.0,
+        stats_ttl: float = 1.0,
+    ) -> None:
+        self.queue_size = queue_size
+        self.max_batch_size = max_batch_size
+        self.compress_min_recipients = compress_min_recipients
+        self.compress_min_bytes = compress_min_bytes
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ping_after = ping_after
+        self.reap_interval = reap_interval
+        self._reaper_task: Optional[asyncio.Task] = None
+        self.stats_ttl = stats_ttl
+        self._clients_cache: Tuple[float, Optional[List[Dict[str, Any]]]] = (0.0, None)
         self.active_connections: Dict[str, ConnectionState] = {}
-        self.user_connections: Dict[int, Set[str]] = defaultdict(set)
-        self.channel_index: Dict[str, Set[str]] = defaultdict(set)
-        self.default_channels: Set[str] = {"jobs", "system", "notifications"}
-        self._lock = asyncio.Lock()
+        # The fan-out indexes hold small integer handles rather than client id
+        # strings; ``_connections_by_handle`` resolves them back to state.
+        self._next_handle = 0
+        self._connections_by_handle: Dict[int, ConnectionState] = {}
+        self.user_connections: Dict[int, Set[int]] = {}
+        # Subscribers are kept in flat lists for fast fan-out; the positions
+        # map is only consulted on churn to swap-remove in O(1).
+        self.channel_index: Dict[str, List[int]] = {}
+        self._channel_positions: Dict[str, Dict[int, int]] = {}
+        self.default_channels: FrozenSet[str] = frozenset({"jobs", "system", "notifications"})
+        self._default_channels_sorted: Tuple[str, ...] = tuple(sorted(self.default_channels))
+        self._pong_cache: Tuple[int, str] = (-1, "")
+        self._system_status_provider: Optional[SystemStatusProvider] = None
+        self._close_tasks: Set[asyncio.Task] = set()
+        self._handlers: Dict[
+            str, Callable[[str, Dict[str, Any], ConnectionState], Awaitable[None]]
+        ] = {
+            "subscribe": self._on_subscribe,
+            "unsubscribe": self._on_unsubscribe,
+            "ping": self._on_ping,
+            "heartbeat": self._on_ping,
+            "resync": self._on_resync,
+        }
+
+    def attach_system_status_provider(self, provider: SystemStatusProvider) -> None:
+        """Register the source of full ``system_status`` snapshots.
+
+        ``provider`` returns the latest broadcast state and its sequence
+        number (or ``None`` before the first tick). Clients joining the
+        ``system`` channel receive it at once, so the deltas that follow
+        apply to a complete state.
+        """
+        self._system_status_provider = provider
+
+    async def start(self) -> None:
+        """Start the stale-connection reaper."""
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reaper_loop())
+
+    async def stop(self) -> None:
+        """Stop the reaper and every connection writer."""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:  # pragma: no cover - cancellation path
+                pass
+            self._reaper_task = None
+        states = list(self.active_connections.values())
+        for state in states:
+            self.disconnect(state.client_id)
+        await self._close_sockets(states)
+
+    async def _reaper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            await self.reap_stale_connections()
+
+    async def reap_stale_connections(self, now: Optional[datetime] = None) -> List[str]:
+        """Disconnect silent clients and ping the ones approaching the deadline."""
+        now = now or datetime.utcnow()
+        timeout = timedelta(seconds=self.heartbeat_timeout)
+        ping_after = timedelta(seconds=self.ping_after)
+        reaped: List[ConnectionState] = []
+        for client_id, state in list(self.active_connections.items()):
+            silence = now - state.last_seen
+            if silence > timeout:
+                self.disconnect(client_id)
+                reaped.append(state)
+            elif silence > ping_after:
+                self._enqueue(client_id, state, _PING_FRAME, coalescible=True)
+        await self._close_sockets(reaped)
+        return [state.client_id for state in reaped]
+
+    async def _close_sockets(self, states: List[ConnectionState]) -> None:
+        """Close detached sockets concurrently; one failing close never aborts the rest."""
+        if not states:
+            return
+        async with asyncio.TaskGroup() as group:
+            for state in states:
+                group.create_task(self._close_quietly(state))
+
+    @staticmethod
+    async def _close_quietly(state: ConnectionState) -> None:
+        try:
+            await state.websocket.close(code=1001)
+        except Exception:
+            pass
 
     async def connect(
         self,
@@ -40,28 +245,64 @@ class WebSocketManager:
         channels: Optional[Iterable[str]] = None,
     ) -> None:
         await websocket.accept()
-        connection_channels = set(channels or self.default_channels)
+        # Connections on the default channels share one frozenset; subscription
+        # changes rebind ``state.channels`` instead of mutating it.
+        connection_channels: AbstractSet[str] = (
+            frozenset(channels) if channels else self.default_channels
+        )
 
-        async with self._lock:
-            state = ConnectionState(
-                websocket=websocket,
-                user_id=user_id,
-                channels=connection_channels,
-            )
-            self.active_connections[client_id] = state
-            if user_id is not None:
-                self.user_connections[user_id].add(client_id)
-            for channel in connection_channels:
-                self.channel_index[channel].add(client_id)
+        # The index updates below never await, so they are atomic on the
+        # event loop and need no lock. A reconnect under the same id replaces
+        # the previous connection.
+        self.disconnect(client_id)
+        self._next_handle += 1
+        handle = self._next_handle
+        state = ConnectionState(
+            websocket=websocket,
+            user_id=user_id,
+            client_id=client_id,
+            handle=handle,
+            channels=connection_channels,
+            out_queue=asyncio.Queue(maxsize=self.queue_size),
+        )
+        if connection_channels is self.default_channels:
+            state.sorted_channels_cache = self._default_channels_sorted
+        state.writer_task = asyncio.create_task(self._writer_loop(client_id, state))
+        self.active_connections[client_id] = state
+        self._connections_by_handle[handle] = state
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, set()).add(handle)
+        for channel in connection_channels:
+            self._index_channel(channel, handle)
 
         await self.send_personal_message(
             {
                 "type": "connection",
                 "message": "Connected to SEIDRA - Build your own myth",
                 "clientId": client_id,
-                "channels": sorted(connection_channels),
+                "channels": state.sorted_channels(),
                 "userId": user_id,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": _now_iso(),
+            },
+            client_id,
+        )
+        if _SYSTEM_CHANNEL in connection_channels:
+            await self._send_system_keyframe(client_id)
+
+    async def _send_system_keyframe(self, client_id: str) -> None:
+        if self._system_status_provider is None:
+            return
+        keyframe = self._system_status_provider()
+        if keyframe is None:
+            return
+        data, seq = keyframe
+        await self.send_personal_message(
+            {
+                "type": "system_status",
+                "data": data,
+                "seq": seq,
+                "delta": False,
+                "timestamp": _now_iso(),
             },
             client_id,
         )
@@ -71,28 +312,124 @@ class WebSocketManager:
         if not state:
             return
 
+        if state.writer_task is not None and state.writer_task is not asyncio.current_task():
+            state.writer_task.cancel()
+
+        handle = state.handle
+        self._connections_by_handle.pop(handle, None)
         if state.user_id is not None:
-            clients = self.user_connections.get(state.user_id)
-            if clients:
-                clients.discard(client_id)
-                if not clients:
+            handles = self.user_connections.get(state.user_id)
+            if handles:
+                handles.discard(handle)
+                if not handles:
                     self.user_connections.pop(state.user_id, None)
 
-        for channel in list(state.channels):
-            subscribers = self.channel_index.get(channel)
-            if subscribers:
-                subscribers.discard(client_id)
-                if not subscribers:
-                    self.channel_index.pop(channel, None)
+        for channel in state.channels:
+            self._unindex_channel(channel, handle)
+
+    def _index_channel(self, channel: str, handle: int) -> None:
+        positions = self._channel_positions.setdefault(channel, {})
+        if handle in positions:
+            return
+        subscribers = self.channel_index.setdefault(channel, [])
+        positions[handle] = len(subscribers)
+        subscribers.append(handle)
+
+    def _unindex_channel(self, channel: str, handle: int) -> None:
+        positions = self._channel_positions.get(channel)
+        if not positions or handle not in positions:
+            return
+        subscribers = self.channel_index[channel]
+        index = positions.pop(handle)
+        last = subscribers.pop()
+        if last != handle:
+            subscribers[index] = last
+            positions[last] = index
+        if not subscribers:
+            self.channel_index.pop(channel, None)
+            self._channel_positions.pop(channel, None)
 
     async def send_personal_message(self, message: Dict[str, Any], client_id: str) -> None:
         state = self.active_connections.get(client_id)
         if not state:
             return
+        self._enqueue(client_id, state, _encode(message))
+
+    def _enqueue(
+        self,
+        client_id: str,
+        state: ConnectionState,
+        frame: Union[str, bytes],
+        *,
+        coalescible: bool = False,
+    ) -> None:
+        queue = state.out_queue
+        try:
+            queue.put_nowait((frame, coalescible))
+            return
+        except asyncio.QueueFull:
+            pass
+        # Never block the producer: make room by dropping the oldest frame a
+        # later one supersedes. Overflow is rare, so rebuilding the queue is fine.
+        pending = [queue.get_nowait() for _ in range(queue.qsize())]
+        for index, (_, droppable) in enumerate(pending):
+            if droppable:
+                del pending[index]
+                pending.append((frame, coalescible))
+                break
+        else:
+            if not coalescible:
+                # Losing a completion or error would leave the client wrong
+                # for good; drop the connection so it reconnects and resyncs.
+                asyncio.get_running_loop().call_soon(
+                    self._evict_slow_consumer, client_id, state
+                )
+        for item in pending:
+            queue.put_nowait(item)
+
+    def _evict_slow_consumer(self, client_id: str, state: ConnectionState) -> None:
+        # Deferred so fan-out never sees the indexes change mid-iteration.
+        if self.active_connections.get(client_id) is not state:
+            return
+        self.disconnect(client_id)
+        task = asyncio.create_task(self._close_quietly(state))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def _writer_loop(self, client_id: str, state: ConnectionState) -> None:
         try:
-            await state.websocket.send_text(json.dumps(message))
+            queue = state.out_queue
+            while True:
+                batch = [(await queue.get())[0]]
+                try:
+                    while len(batch) < self.max_batch_size:
+                        batch.append(queue.get_nowait()[0])
+                except asyncio.QueueEmpty:
+                    pass
+                # Compressed frames go out as-is; runs of text messages between
+                # them are coalesced so ordering is preserved.
+                texts: List[str] = []
+                for frame in batch:
+                    if isinstance(frame, bytes):
+                        await self._send_texts(state.websocket, texts)
+                        texts = []
+                        await state.websocket.send_bytes(frame)
+                    else:
+                        texts.append(frame)
+                await self._send_texts(state.websocket, texts)
+        except asyncio.CancelledError:
+            raise
         except Exception:
-            self.disconnect(client_id)
+            if self.active_connections.get(client_id) is state:
+                self.disconnect(client_id)
+
+    @staticmethod
+    async def _send_texts(websocket: WebSocket, texts: List[str]) -> None:
+        if not texts:
+            return
+        # A single message keeps the historical one-object-per-frame format.
+        text = texts[0] if len(texts) == 1 else "[" + ",".join(texts) + "]"
+        await websocket.send_text(text)
 
     async def dispatch_event(
         self,
@@ -101,76 +438,156 @@ class WebSocketManager:
         channels: Optional[Iterable[str]] = None,
         user_id: Optional[int] = None,
     ) -> None:
-        recipients: Set[str] = set()
-        target_channels = set(channels or [])
+        self.publish(message, channels=channels, user_id=user_id)
+
+    def publish(
+        self,
+        message: Dict[str, Any],
+        *,
+        channels: Optional[Iterable[str]] = None,
+        user_id: Optional[int] = None,
+        coalescible: bool = False,
+    ) -> None:
+        """Queue ``message`` for every matching connection without awaiting.
+
+        ``coalescible`` marks messages a later one supersedes, which a full
+        queue may drop.
+        """
 
+        def render() -> str:
+            # Never stamp the caller's dict: a reused message would keep
+            # its first timestamp on later sends.
+            if "timestamp" in message:
+                return _encode(message)
+            return _encode({**message, "timestamp": _now_iso()})
+
+        self._fan_out(render, channels=channels, user_id=user_id, coalescible=coalescible)
+
+    def _fan_out(
+        self,
+        render: Callable[[], str],
+        *,
+        channels: Optional[Iterable[str]],
+        user_id: Optional[int],
+        coalescible: bool = False,
+    ) -> None:
+        target_channels = (
+            channels if isinstance(channels, (set, frozenset)) else set(channels or ())
+        )
+
+        # Iterate the existing indexes directly; only the multi-channel case
+        # needs a union to de-duplicate recipients.
+        connections = self._connections_by_handle
+        recipients: Collection[int]
         if user_id is not None:
-            for client_id in self.user_connections.get(user_id, set()):
-                state = self.active_connections.get(client_id)
-                if not state:
-                    continue
-                if not target_channels or state.channels.intersection(target_channels):
-                    recipients.add(client_id)
+            recipients = self.user_connections.get(user_id, ())
+            if target_channels:
+                recipients = [
+                    handle
+                    for handle in recipients
+                    if handle in connections
+                    and not connections[handle].channels.isdisjoint(target_channels)
+                ]
+        elif len(target_channels) == 1:
+            recipients = self.channel_index.get(next(iter(target_channels)), ())
         elif target_channels:
+            recipients = set()
             for channel in target_channels:
-                recipients.update(self.channel_index.get(channel, set()))
+                recipients.update(self.channel_index.get(channel, ()))
         else:
-            recipients = set(self.active_connections.keys())
+            recipients = connections
 
-        for client_id in recipients:
-            await self.send_personal_message(message, client_id)
+        # Encode (and compress) once for every recipient; the writer tasks
+        # perform the I/O.
+        frame: Union[str, bytes, None] = None
+        for handle in recipients:
+            state = connections.get(handle)
+            if not state:
+                continue
+            if frame is None:
+                frame = render()
+                if (
+                    len(recipients) >= self.compress_min_recipients
+                    and len(frame) >= self.compress_min_bytes
+                ):
+                    frame = zlib.compress(frame.encode(), 1)
+            self._enqueue(state.client_id, state, frame, coalescible=coalescible)
 
     async def handle_client_message(self, client_id: str, payload: Dict[str, Any]) -> None:
-        message_type = payload.get("type")
         state = self.active_connections.get(client_id)
         if not state:
             return
 
         state.last_seen = datetime.utcnow()
+        message_type = payload.get("type")
+        if not isinstance(message_type, str):
+            # Lists or dicts would not even hash for the handler lookup.
+            await self._send_error(client_id, "Invalid command: 'type' must be a string")
+            return
+        handler = self._handlers.get(message_type, self._on_unknown)
+        await handler(client_id, payload, state)
 
-        if message_type == "subscribe":
-            channels = set(payload.get("channels", []))
-            if not channels:
-                return
-            await self._update_subscriptions(client_id, channels, add=True)
-            await self.send_personal_message(
-                {
-                    "type": "subscription_ack",
-                    "channels": sorted(self.active_connections[client_id].channels),
-                    "timestamp": datetime.utcnow().isoformat(),
-                },
-                client_id,
-            )
-        elif message_type == "unsubscribe":
-            channels = set(payload.get("channels", []))
-            if not channels:
-                return
-            await self._update_subscriptions(client_id, channels, add=False)
-            await self.send_personal_message(
-                {
-                    "type": "subscription_ack",
-                    "channels": sorted(self.active_connections[client_id].channels),
-                    "timestamp": datetime.utcnow().isoformat(),
-                },
-                client_id,
-            )
-        elif message_type in {"ping", "heartbeat"}:
-            await self.send_personal_message(
-                {
-                    "type": "pong",
-                    "timestamp": datetime.utcnow().isoformat(),
-                },
-                client_id,
-            )
-        else:
-            await self.send_personal_message(
-                {
-                    "type": "error",
-                    "message": f"Unknown command: {message_type}",
-                    "timestamp": datetime.utcnow().isoformat(),
-                },
-                client_id,
+    async def _on_subscribe(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState
+    ) -> None:
+        await self._acknowledge_subscriptions(client_id, payload, state, add=True)
+
+    async def _on_unsubscribe(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState
+    ) -> None:
+        await self._acknowledge_subscriptions(client_id, payload, state, add=False)
+
+    async def _acknowledge_subscriptions(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState, *, add: bool
+    ) -> None:
+        channels = set(payload.get("channels", []))
+        if not channels:
+            return
+        joins_system = add and _SYSTEM_CHANNEL in channels and _SYSTEM_CHANNEL not in state.channels
+        await self._update_subscriptions(client_id, channels, add=add)
+        await self.send_personal_message(
+            {
+                "type": "subscription_ack",
+                "channels": state.sorted_channels(),
+                "timestamp": _now_iso(),
+            },
+            client_id,
+        )
+        if joins_system:
+            await self._send_system_keyframe(client_id)
+
+    async def _on_ping(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState
+    ) -> None:
+        # Pongs only differ by timestamp, so every pong within the same
+        # wall-clock second shares one pre-rendered frame.
+        second = int(time.time())
+        if self._pong_cache[0] != second:
+            timestamp = (
+                datetime.fromtimestamp(second, tz=timezone.utc)
+                .replace(tzinfo=None)
+                .isoformat()
             )
+            self._pong_cache = (second, _PONG_TEMPLATE % timestamp)
+        self._enqueue(client_id, state, self._pong_cache[1])
+
+    async def _on_resync(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState
+    ) -> None:
+        # Clients that missed a system_status delta ask for a fresh keyframe.
+        if _SYSTEM_CHANNEL in state.channels:
+            await self._send_system_keyframe(client_id)
+
+    async def _on_unknown(
+        self, client_id: str, payload: Dict[str, Any], state: ConnectionState
+    ) -> None:
+        await self._send_error(client_id, f"Unknown command: {payload.get('type')}")
+
+    async def _send_error(self, client_id: str, message: str) -> None:
+        await self.send_personal_message(
+            {"type": "error", "message": message, "timestamp": _now_iso()},
+            client_id,
+        )
 
     async def _update_subscriptions(
         self, client_id: str, channels: Set[str], *, add: bool
@@ -179,19 +596,15 @@ class WebSocketManager:
         if not state:
             return
 
-        async with self._lock:
-            if add:
-                state.channels.update(channels)
-                for channel in channels:
-                    self.channel_index[channel].add(client_id)
-            else:
-                for channel in channels:
-                    state.channels.discard(channel)
-                    subscribers = self.channel_index.get(channel)
-                    if subscribers:
-                        subscribers.discard(client_id)
-                        if not subscribers:
-                            self.channel_index.pop(channel, None)
+        state.sorted_channels_cache = None
+        if add:
+            state.channels = state.channels | channels
+            for channel in channels:
+                self._index_channel(channel, state.handle)
+        else:
+            state.channels = state.channels - channels
+            for channel in channels:
+                self._unindex_channel(channel, state.handle)
 
     async def send_generation_progress(
         self,
@@ -203,16 +616,38 @@ class WebSocketManager:
         message: str = "",
         metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
-        payload = {
-            "type": "generation_progress",
-            "jobId": job_id,
-            "progress": progress,
-            "status": status,
-            "message": message,
-            "metadata": metadata or {},
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-        await self.dispatch_event(payload, channels={"jobs"}, user_id=user_id)
+        self.publish_progress_sync(
+            job_id, progress, user_id, status=status, message=message, metadata=metadata
+        )
+
+    def publish_progress_sync(
+        self,
+        job_id: str,
+        progress: float,
+        user_id: int,
+        *,
+        status: str = "processing",
+        message: str = "",
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue a progress event without awaiting.
+
+        Must be called from the event-loop thread: the per-connection queues
+        are ``asyncio.Queue`` objects, which are not thread-safe. Worker
+        threads should hop over with ``loop.call_soon_threadsafe``.
+        """
+
+        def render() -> str:
+            return _PROGRESS_TEMPLATE % (
+                _encode(job_id),
+                _encode(progress),
+                _encode(status),
+                _encode(message),
+                _encode(metadata or {}),
+                _now_iso(),
+            )
+
+        self._fan_out(render, channels=_JOBS_CHANNELS, user_id=user_id, coalescible=True)
 
     async def send_generation_complete(
         self,
@@ -226,9 +661,8 @@ class WebSocketManager:
             "jobId": job_id,
             "result": result_files,
             "metadata": metadata or {},
-            "timestamp": datetime.utcnow().isoformat(),
         }
-        await self.dispatch_event(payload, channels={"jobs"}, user_id=user_id)
+        self.publish(payload, channels=_JOBS_CHANNELS, user_id=user_id)
 
     async def send_generation_error(
         self, job_id: str, error_message: str, user_id: int
@@ -237,34 +671,54 @@ class WebSocketManager:
             "type": "generation_error",
             "jobId": job_id,
             "error": error_message,
-            "timestamp": datetime.utcnow().isoformat(),
         }
-        await self.dispatch_event(payload, channels={"jobs"}, user_id=user_id)
+        self.publish(payload, channels=_JOBS_CHANNELS, user_id=user_id)
 
-    async def send_system_status(self, status_data: Dict[str, Any]) -> None:
-        payload = {
+    async def send_system_status(
+        self,
+        status_data: Dict[str, Any],
+        *,
+        seq: Optional[int] = None,
+        delta: bool = False,
+    ) -> None:
+        payload: Dict[str, Any] = {
             "type": "system_status",
             "data": status_data,
-            "timestamp": datetime.utcnow().isoformat(),
         }
-        await self.dispatch_event(payload, channels={"system"})
+        if seq is not None:
+            payload["seq"] = seq
+            payload["delta"] = delta
+        self.publish(payload, channels={_SYSTEM_CHANNEL}, coalescible=True)
+
+    def get_connection_stats(self, *, verbose: bool = False) -> Dict[str, Any]:
+        """Summarise live connections.
 
-    def get_connection_stats(self) -> Dict[str, Any]:
-        return {
+        The summary counts come straight from the indexes. The per-client
+        listing is only built when ``verbose`` is set and is cached for
+        ``stats_ttl`` seconds.
+        """
+        stats: Dict[str, Any] = {
             "total_connections": len(self.active_connections),
             "active_users": len(self.user_connections),
             "channels": {channel: len(clients) for channel, clients in self.channel_index.items()},
-            "clients": [
-                {
-                    "clientId": client_id,
-                    "userId": state.user_id,
-                    "channels": sorted(state.channels),
-                    "connectedAt": state.connected_at.isoformat(),
-                    "lastSeen": state.last_seen.isoformat(),
-                }
-                for client_id, state in self.active_connections.items()
-            ],
         }
+        if verbose:
+            now = time.monotonic()
+            cached_at, clients = self._clients_cache
+            if clients is None or now - cached_at >= self.stats_ttl:
+                clients = [
+                    {
+                        "clientId": client_id,
+                        "userId": state.user_id,
+                        "channels": list(state.sorted_channels()),
+                        "connectedAt": state.connected_at.isoformat(),
+                        "lastSeen": state.last_seen.isoformat(),
+                    }
+                    for client_id, state in self.active_connections.items()
+                ]
+                self._clients_cache = (now, clients)
+            stats["clients"] = clients
+        return stats
 
 
 __all__ = ["WebSocketManager"]
@@ -1,6 +1,19 @@
+import importlib
+import importlib.util
+import json as jsonlib
 import os
 from pathlib import Path
+import sqlite3
 import sys
+from types import SimpleNamespace
+from typing import Any
+from urllib.parse import urlparse
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
@@ -9,3 +22,626 @@ if str(ROOT_DIR) not in sys.path:
 # Enable the system user fallback in the test environment so existing
 # API tests keep operating without real JWT tokens.
 os.environ.setdefault("SEIDRA_ALLOW_SYSTEM_FALLBACK", "1")
+
+
+def _ensure_httpx_stub() -> None:
+    if "httpx" in sys.modules or importlib.util.find_spec("httpx") is not None:
+        return
+
+    class URL:
+        def __init__(self, value: str):
+            parsed = urlparse(value)
+            self.scheme = parsed.scheme
+            self.host = parsed.hostname or ""
+            self.port = parsed.port
+            self.path = parsed.path or "/"
+            self.query = parsed.query
+            self._raw = value
+
+        def __str__(self) -> str:  # pragma: no cover - debug helper
+            return self._raw
+
+    class Request:
+        def __init__(self, method: str, url: str, *, json_data: Any | None = None):
+            self.method = method.upper()
+            self.url = URL(url)
+            self.headers: dict[str, str] = {}
+            self._json = json_data
+            self._content: bytes | None = None
+
+        @property
+        def content(self) -> bytes:
+            # Serialised on first access only; most handlers never read it.
+            if self._content is None:
+                self._content = b"" if self._json is None else jsonlib.dumps(self._json).encode("utf-8")
+            return self._content
+
+    class HTTPError(Exception):
+        pass
+
+    class HTTPStatusError(HTTPError):
+        def __init__(self, message: str, request: "Request", response: "Response") -> None:
+            super().__init__(message)
+            self.request = request
+            self.response = response
+
+    class Response:
+        def __init__(
+            self,
+            status_code: int,
+            *,
+            json: Any | None = None,
+            content: bytes | None = None,
+            headers: dict[str, str] | None = None,
+        ) -> None:
+            self.status_code = status_code
+            if content is None and json is None:
+                content = b""
+            # JSON bodies are kept as-is and only encoded if the bytes are read.
+            self._content: bytes | None = content
+            self._json = json
+            self.headers = headers or {}
+
+        async def __aenter__(self) -> "Response":
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb) -> None:
+            return None
+
+        def raise_for_status(self) -> None:
+            if self.status_code >= 400:
+                raise HTTPStatusError("Request failed", getattr(self, "request", None), self)
+
+        def json(self) -> Any:
+            if self._json is not None:
+                return self._json
+            return jsonlib.loads(self._content.decode("utf-8"))
+
+        async def aiter_bytes(self):
+            yield self.content
+
+        @property
+        def content(self) -> bytes:
+            if self._content is None:
+                self._content = jsonlib.dumps(self._json).encode("utf-8")
+            return self._content
+
+    class Timeout:
+        def __init__(self, *_, **__):
+            pass
+
+    class MockTransport:
+        def __init__(self, handler):
+            self.handler = handler
+
+    class AsyncClient:
+        def __init__(self, *, transport: MockTransport | None = None, timeout: Timeout | None = None):
+            self._transport = transport
+            self._timeout = timeout
+
+        async def __aenter__(self) -> "AsyncClient":
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb) -> None:
+            await self.aclose()
+
+        async def aclose(self) -> None:
+            return None
+
+        async def post(self, url: str, json: Any | None = None) -> Response:
+            return await self._send("POST", url, json)
+
+        async def get(self, url: str) -> Response:
+            return await self._send("GET", url, None)
+
+        def stream(self, method: str, url: str):
+            request = Request(method, url)
+            response = self._call_handler(request)
+            response.request = request  # type: ignore[attr-defined]
+            return _ResponseContextManager(response)
+
+        async def _send(self, method: str, url: str, json_payload: Any | None) -> Response:
+            request = Request(method, url, json_data=json_payload)
+            response = self._call_handler(request)
+            response.request = request  # type: ignore[attr-defined]
+            response.raise_for_status()
+            return response
+
+        def _call_handler(self, request: Request) -> Response:
+            if not self._transport:
+                raise RuntimeError("Mock httpx client cannot perform real HTTP requests")
+            response = self._transport.handler(request)
+            if not isinstance(response, Response):
+                raise TypeError("MockTransport handler must return Response")
+            return response
+
+    class _ResponseContextManager:
+        def __init__(self, response: Response) -> None:
+            self._response = response
+
+        async def __aenter__(self) -> Response:
+            return self._response
+
+        async def __aexit__(self, exc_type, exc, tb) -> None:
+            return None
+
+    import types
+
+    stub = types.ModuleType("httpx")
+    vars(stub).update(
+        URL=URL,
+        Request=Request,
+        Response=Response,
+        AsyncClient=AsyncClient,
+        MockTransport=MockTransport,
+        Timeout=Timeout,
+        HTTPError=HTTPError,
+        HTTPStatusError=HTTPStatusError,
+    )
+    sys.modules["httpx"] = stub
+
+
+def _ensure_pydantic_stack() -> None:
+    # Only stand in for pydantic when it is missing; shadowing an installed
+    # copy breaks ``core.config`` when a module runs on its own.
+    if "pydantic" not in sys.modules and importlib.util.find_spec("pydantic") is None:
+        import types
+
+        class _BaseModel:
+            def __init__(self, **data: Any) -> None:
+                for key, value in data.items():
+                    setattr(self, key, value)
+
+        def _field(default=None, *, env=None, default_factory=None, **_kwargs):  # noqa: ANN001
+            if default_factory is not None:
+                return default_factory()
+            return default
+
+        def _validator(*_args, **_kwargs):  # noqa: ANN001
+            def decorator(func):
+                return func
+
+            return decorator
+
+        pydantic_module = types.ModuleType("pydantic")
+        pydantic_module.BaseModel = _BaseModel
+        pydantic_module.Field = _field
+        pydantic_module.validator = _validator
+        sys.modules["pydantic"] = pydantic_module
+
+    if "pydantic_settings" not in sys.modules and importlib.util.find_spec("pydantic_settings") is None:
+        import types
+
+        class _BaseSettings(sys.modules["pydantic"].BaseModel):  # type: ignore[attr-defined]
+            model_config: dict[str, Any] = {"extra": "allow"}
+
+        settings_module = types.ModuleType("pydantic_settings")
+        settings_module.BaseSettings = _BaseSettings
+        sys.modules["pydantic_settings"] = settings_module
+
+
+def _ensure_alembic_stub() -> None:
+    if "alembic" in sys.modules:
+        return
+
+    import types
+
+    command_module = types.ModuleType("alembic.command")
+
+    def _upgrade(*_args, **_kwargs) -> None:  # noqa: ANN001
+        return None
+
+    command_module.upgrade = _upgrade
+
+    config_module = types.ModuleType("alembic.config")
+
+    class _Config:
+        def __init__(self, *_args, **_kwargs) -> None:  # noqa: ANN001
+            self.options: dict[str, Any] = {}
+
+        def set_main_option(self, key: str, value: str) -> None:
+            self.options[key] = value
+
+    config_module.Config = _Config
+
+    alembic_module = types.ModuleType("alembic")
+    alembic_module.command = command_module
+    alembic_module.config = config_module
+    sys.modules["alembic"] = alembic_module
+    sys.modules["alembic.command"] = command_module
+    sys.modules["alembic.config"] = config_module
+
+
+def _install_database_stub() -> None:
+    from dataclasses import dataclass, field, fields
+    from datetime import datetime
+    import types
+    from types import SimpleNamespace
+
+    if "services.database" in sys.modules:
+        return
+
+    # Slotted records mirroring the ORM columns the workers touch.
+    @dataclass(slots=True)
+    class User:
+        id: int
+        username: str
+        email: str
+        hashed_password: str
+        is_active: bool = True
+        is_nsfw_enabled: bool = False
+        age_verified: bool = False
+        created_at: datetime = field(default_factory=datetime.utcnow)
+        settings: dict[str, Any] = field(default_factory=dict)
+
+    @dataclass(slots=True)
+    class GenerationJob:
+        id: str
+        user_id: int = 1
+        persona_id: int | None = None
+        job_type: str = "image"
+        prompt: str = ""
+        negative_prompt: str = ""
+        model_name: str = "sdxl-base"
+        lora_models: list[Any] = field(default_factory=list)
+        parameters: dict[str, Any] = field(default_factory=dict)
+        status: str = "pending"
+        progress: float = 0.0
+        result_images: list[str] = field(default_factory=list)
+        metadata_payload: dict[str, Any] = field(default_factory=dict)
+        is_nsfw: bool = False
+        nsfw_score: float = 0.0
+        error_message: str | None = None
+        created_at: datetime = field(default_factory=datetime.utcnow)
+        updated_at: datetime = field(default_factory=datetime.utcnow)
+        completed_at: datetime | None = None
+
+    @dataclass(slots=True)
+    class MediaItem:
+        id: str
+        user_id: int
+        job_id: str
+        file_path: str
+        thumbnail_path: str | None = None
+        file_type: str = "image"
+        mime_type: str = "image/png"
+        metadata_payload: dict[str, Any] = field(default_factory=dict)
+        tags: list[str] = field(default_factory=list)
+        is_favorite: bool = False
+        is_nsfw: bool = False
+        nsfw_tags: list[str] = field(default_factory=list)
+        created_at: datetime = field(default_factory=datetime.utcnow)
+        updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    @dataclass(slots=True)
+    class _Store:
+        users: dict[int, User] = field(default_factory=dict)
+        jobs: dict[str, GenerationJob] = field(default_factory=dict)
+        media: list[MediaItem] = field(default_factory=list)
+        next_user_id: int = 1
+        next_job_id: int = 1
+
+    store = _Store()
+    job_fields = frozenset(item.name for item in fields(GenerationJob))
+    media_fields = frozenset(item.name for item in fields(MediaItem))
+
+    def _known(names: frozenset[str], values: dict[str, Any]) -> dict[str, Any]:
+        if "metadata" in values:
+            values = {**values, "metadata_payload": values["metadata"]}
+        return {key: value for key, value in values.items() if key in names}
+
+    class DatabaseService:
+        def __init__(self) -> None:
+            self._store = store
+
+        def close(self) -> None:  # pragma: no cover
+            return None
+
+        def create_user(self, username: str, email: str, hashed_password: str) -> User:
+            user_id = self._store.next_user_id
+            self._store.next_user_id += 1
+            user = User(id=user_id, username=username, email=email, hashed_password=hashed_password)
+            self._store.users[user_id] = user
+            return user
+
+        def create_job(self, **kwargs: Any) -> GenerationJob:
+            values = _known(job_fields, kwargs)
+            values["id"] = kwargs.get("id") or str(self._store.next_job_id)
+            self._store.next_job_id += 1
+            if "created_at" in values:
+                values.setdefault("updated_at", values["created_at"])
+            job = GenerationJob(**values)
+            self._store.jobs[job.id] = job
+            return job
+
+        def get_job(self, job_id: str) -> GenerationJob | None:
+            return self._store.jobs.get(job_id)
+
+        def update_job(self, job_id: str, **kwargs: Any) -> GenerationJob | None:
+            job = self._store.jobs.get(job_id)
+            if job is None:
+                defaults = {
+                    "id": job_id,
+                    "user_id": kwargs.get("user_id", 1),
+                    "job_type": kwargs.get("job_type", "image"),
+                    "prompt": kwargs.get("prompt", ""),
+                    "model_name": kwargs.get("model_name", "sdxl-base"),
+                }
+                job = self.create_job(**defaults)
+            for key, value in _known(job_fields, kwargs).items():
+                setattr(job, key, value)
+            job.updated_at = datetime.utcnow()
+            return job
+
+        def create_media_item(self, **kwargs: Any) -> MediaItem:
+            media = MediaItem(**_known(media_fields, kwargs))
+            self._store.media.append(media)
+            return media
+
+    stub_module = types.ModuleType("services.database")
+    stub_module.DatabaseService = DatabaseService
+    stub_module.GenerationJob = GenerationJob
+    stub_module.MediaItem = MediaItem
+    stub_module.User = User
+    stub_module.__spec__ = SimpleNamespace(name="services.database")
+    sys.modules["services.database"] = stub_module
+
+
+def _install_pil_stub() -> None:
+    import types
+
+    if "PIL" in sys.modules and "PIL.Image" in sys.modules:
+        return
+
+    pil_module = types.ModuleType("PIL")
+    image_module = types.ModuleType("PIL.Image")
+
+    class _Image:
+        pass
+
+    def _new(*_args, **_kwargs) -> _Image:  # noqa: ANN001
+        return _Image()
+
+    image_module.Image = _Image
+    image_module.new = _new
+
+    pil_module.Image = image_module
+    sys.modules["PIL"] = pil_module
+    sys.modules["PIL.Image"] = image_module
+
+
+def _install_fastapi_stub() -> None:
+    import types
+
+    if "fastapi" in sys.modules:
+        return
+
+    fastapi_module = types.ModuleType("fastapi")
+
+    class WebSocket:  # pragma: no cover - simple stub
+        async def accept(self) -> None:
+            return None
+
+        async def send_text(self, _message: str) -> None:
+            return None
+
+    fastapi_module.WebSocket = WebSocket
+    sys.modules["fastapi"] = fastapi_module
+
+
+def _install_celery_stub() -> None:
+    import types
+
+    if "celery" in sys.modules or importlib.util.find_spec("celery") is not None:
+        return
+
+    celery_module = types.ModuleType("celery")
+
+    class _Task:
+        """Mirrors a directly called Celery task: ``run`` is bound, retries re-raise."""
+
+        def __init__(self, func, *, bind: bool = False, max_retries: int = 3, **_kwargs) -> None:  # noqa: ANN001
+            self.max_retries = max_retries
+            self.request = SimpleNamespace(retries=0)
+            self.run = func.__get__(self) if bind else func
+
+        def __call__(self, *args, **kwargs):  # noqa: ANN002, ANN003
+            return self.run(*args, **kwargs)
+
+        def retry(self, *_args, exc: BaseException | None = None, **_kwargs):  # noqa: ANN002, ANN003
+            raise exc or RuntimeError("retry")
+
+    class Celery:
+        class _Config:
+            def update(self, *_args, **_kwargs) -> None:
+                return None
+
+        def __init__(self, *_args, **_kwargs) -> None:  # noqa: ANN001
+            self.conf = self._Config()
+
+        def task(self, *task_args, **task_kwargs):  # noqa: ANN001
+            def decorator(func):
+                return _Task(func, **task_kwargs)
+
+            return decorator
+
+    celery_module.Celery = Celery
+
+    schedules_module = types.ModuleType("celery.schedules")
+
+    def crontab(*_args, **_kwargs):  # noqa: ANN001
+        return {"args": _args, "kwargs": _kwargs}
+
+    schedules_module.crontab = crontab
+    celery_module.schedules = schedules_module
+    sys.modules["celery"] = celery_module
+    sys.modules["celery.schedules"] = schedules_module
+
+
+def _install_kombu_stub() -> None:
+    import types
+
+    if "kombu" in sys.modules or importlib.util.find_spec("kombu") is not None:
+        return
+
+    kombu_module = types.ModuleType("kombu")
+
+    class Queue:
+        def __init__(self, name, *_args, **_kwargs) -> None:  # noqa: ANN001
+            self.name = name
+
+    kombu_module.Queue = Queue
+    sys.modules["kombu"] = kombu_module
+
+
+@pytest.fixture(scope="session")
+def celery_stubs():
+    """Install the lightweight dependency stubs used by the Celery tests once.
+
+    Not autouse: the in-memory ``services.database`` replacement would leak
+    into the tests that exercise the real database layer.
+    """
+    sys.modules.pop("services.database", None)
+
+    _ensure_httpx_stub()
+    _ensure_pydantic_stack()
+    _ensure_alembic_stub()
+    _install_database_stub()
+    _install_pil_stub()
+    _install_fastapi_stub()
+    _install_celery_stub()
+    _install_kombu_stub()
+
+
+@pytest.fixture(scope="session")
+def worker_tmp(tmp_path_factory):
+    """A scratch directory private to this pytest-xdist worker.
+
+    ``PYTEST_XDIST_WORKER`` is only set under ``pytest -n``; serial runs use
+    ``main``. Each worker is its own process, so the settings and
+    ``sys.modules`` patches made by the Celery fixtures never cross workers.
+    """
+    return tmp_path_factory.mktemp(os.environ.get("PYTEST_XDIST_WORKER", "main"))
+
+
+@pytest.fixture(scope="session")
+def celery_service_modules(celery_stubs):
+    """Import the service layer behind the Celery workers once per session.
+
+    The modules are re-imported a single time so they bind the stubs above;
+    tests patch their module-level ``settings`` instead of re-importing them.
+    """
+    for module in (
+        "services.model_repository",
+        "services.model_manager",
+        "services.generation_service",
+    ):
+        sys.modules.pop(module, None)
+
+    return SimpleNamespace(
+        database=importlib.import_module("services.database"),
+        generation_service=importlib.import_module("services.generation_service"),
+        model_manager=importlib.import_module("services.model_manager"),
+        model_repository=importlib.import_module("services.model_repository"),
+    )
+
+
+def _relax_sqlite_durability(dbapi_connection, _record) -> None:  # noqa: ANN001
+    # Test databases are thrown away, so fsyncs and an on-disk journal only
+    # cost time. In-memory databases already behave this way.
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    files = [row[2] for row in dbapi_connection.execute("PRAGMA database_list")]
+    if not any(files):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_sqlite_files():
+    """Apply the durability-free PRAGMAs to every file-backed test engine."""
+    event.listen(Engine, "connect", _relax_sqlite_durability)
+    yield
+    event.remove(Engine, "connect", _relax_sqlite_durability)
+
+
+@pytest.fixture(scope="session")
+def database_engine():
+    """In-memory engine whose schema is created once for the whole session."""
+    _ensure_alembic_stub()
+    from services import database as database_module
+
+    engine = create_engine(
+        "sqlite://",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, _record):  # noqa: ANN001
+        # Let SQLAlchemy emit BEGIN itself so pysqlite honours SAVEPOINTs.
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):  # noqa: ANN001
+        connection.exec_driver_sql("BEGIN")
+
+    database_module.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _bind_database_module(monkeypatch, module, engine, session_factory) -> None:  # noqa: ANN001
+    monkeypatch.setattr(module, "engine", engine)
+    monkeypatch.setattr(module, "SessionLocal", session_factory)
+    monkeypatch.setattr(module, "_SCHEMA_INITIALISED", True)
+    # SEIDRA_DATABASE_URL is cached by the secret manager; never rebind away.
+    monkeypatch.setattr(
+        module.DatabaseService, "_ensure_runtime_bind", staticmethod(lambda: None)
+    )
+
+
+@pytest.fixture
+def database_session_factory(database_engine, monkeypatch):
+    """Bind the database layer to an outer transaction rolled back afterwards.
+
+    Service-level commits only release SAVEPOINTs, so no rows or DDL have to
+    be replayed between tests.
+    """
+    from services import database as database_module
+
+    connection = database_engine.connect()
+    transaction = connection.begin()
+    session_factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+    )
+    _bind_database_module(monkeypatch, database_module, database_engine, session_factory)
+
+    try:
+        yield session_factory
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def bind_database_module(database_engine, database_session_factory, monkeypatch):
+    """Return a callable binding a given ``services.database`` module object.
+
+    Some test modules drop ``services.database`` from ``sys.modules``; a module
+    imported at collection time is then not the one ``database_session_factory``
+    patched.
+    """
+
+    def bind(module) -> None:  # noqa: ANN001
+        _bind_database_module(monkeypatch, module, database_engine, database_session_factory)
+
+    return bind
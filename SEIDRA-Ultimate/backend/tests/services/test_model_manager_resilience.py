@@ -1,64 +1,24 @@
 import asyncio
 import base64
-import importlib
-from pathlib import Path
+from collections import deque
+import importlib.util
 import sys
 import types
 from typing import Any
+from unittest.mock import AsyncMock
 
 import pytest
 
-try:  # pragma: no cover - compatibilité sans httpx installé
-    import httpx  # type: ignore
-except ImportError:  # pragma: no cover
-    class _DummyRequest:
-        def __init__(self, method: str, url: str) -> None:
-            self.method = method
-            self.url = url
+httpx = pytest.importorskip("httpx")
 
-    class _DummyResponse:
-        def __init__(self, status_code: int, request: _DummyRequest) -> None:
-            self.status_code = status_code
-            self.request = request
 
-    class HTTPStatusError(Exception):
-        def __init__(self, message: str, request: _DummyRequest, response: _DummyResponse) -> None:
-            super().__init__(message)
-            self.request = request
-            self.response = response
-
-    class _HttpxFallback:
-        Request = _DummyRequest
-
-        class Response(_DummyResponse):
-            def __init__(self, status_code: int, request: _DummyRequest) -> None:
-                super().__init__(status_code, request)
-
-        class Timeout:
-            def __init__(self, *args: Any, **kwargs: Any) -> None:
-                pass
-
-        class Limits:
-            def __init__(self, *args: Any, **kwargs: Any) -> None:
-                pass
-
-        class AsyncClient:
-            def __init__(self, *args: Any, **kwargs: Any) -> None:
-                pass
-
-            async def __aenter__(self):
-                return self
-
-            async def __aexit__(self, exc_type, exc, tb):
-                return None
-
-        HTTPStatusError = HTTPStatusError
-
-    httpx = _HttpxFallback()  # type: ignore
+_IMAGE_PAYLOAD = base64.b64encode(b"stub-image").decode("ascii")
 
 
 def _ensure_pydantic_stack() -> None:
-    if "pydantic" not in sys.modules:
+    # Only stand in for pydantic when it is missing; shadowing an installed
+    # copy breaks ``core.config`` when this module runs on its own.
+    if "pydantic" not in sys.modules and importlib.util.find_spec("pydantic") is None:
         module = types.ModuleType("pydantic")
 
         class _BaseModel:
@@ -82,7 +42,7 @@ def _ensure_pydantic_stack() -> None:
         module.validator = _validator
         sys.modules["pydantic"] = module
 
-    if "pydantic_settings" not in sys.modules:
+    if "pydantic_settings" not in sys.modules and importlib.util.find_spec("pydantic_settings") is None:
         module = types.ModuleType("pydantic_settings")
 
         class _BaseSettings(sys.modules["pydantic"].BaseModel):  # type: ignore[attr-defined]
@@ -92,36 +52,6 @@ def _ensure_pydantic_stack() -> None:
         sys.modules["pydantic_settings"] = module
 
 
-def _ensure_httpx_stub() -> None:
-    if "httpx" in sys.modules:
-        return
-
-    module = types.ModuleType("httpx")
-
-    class AsyncClient:
-        def __init__(self, *args, **kwargs):  # noqa: ANN001
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            return None
-
-    class Timeout:
-        def __init__(self, *args, **kwargs):  # noqa: ANN001
-            pass
-
-    class Limits:
-        def __init__(self, *args, **kwargs):  # noqa: ANN001
-            pass
-
-    module.AsyncClient = AsyncClient
-    module.Timeout = Timeout
-    module.Limits = Limits
-    sys.modules["httpx"] = module
-
-
 def _ensure_pil_stub() -> None:
     if "PIL" in sys.modules and "PIL.Image" in sys.modules:
         return
@@ -143,8 +73,39 @@ def _ensure_pil_stub() -> None:
 
 
 class StubNotificationService:
+    """Records pushed notifications as parallel per-field lists."""
+
+    __slots__ = ("levels", "titles", "messages", "categories", "metadata", "tags")
+
     def __init__(self) -> None:
-        self.events: list[dict[str, Any]] = []
+        self.levels: list[str] = []
+        self.titles: list[str] = []
+        self.messages: list[str] = []
+        self.categories: list[str] = []
+        self.metadata: list[dict[str, Any]] = []
+        self.tags: list[list[str]] = []
+
+    @property
+    def events(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "level": level,
+                "title": title,
+                "message": message,
+                "category": category,
+                "metadata": metadata,
+                "tags": tags,
+            }
+            for level, title, message, category, metadata, tags in zip(
+                self.levels,
+                self.titles,
+                self.messages,
+                self.categories,
+                self.metadata,
+                self.tags,
+                strict=True,
+            )
+        ]
 
     async def push(
         self,
@@ -155,22 +116,20 @@ class StubNotificationService:
         category: str = "",
         metadata: dict[str, Any],
         tags: list[str],
-    ) -> dict[str, Any]:
-        entry = {
-            "level": level,
-            "title": title,
-            "message": message,
-            "category": category,
-            "metadata": metadata,
-            "tags": tags,
-        }
-        self.events.append(entry)
-        return entry
+    ) -> None:
+        self.levels.append(level)
+        self.titles.append(title)
+        self.messages.append(message)
+        self.categories.append(category)
+        self.metadata.append(metadata)
+        self.tags.append(tags)
 
 
 class StubTelemetryService:
+    __slots__ = ("records",)
+
     def __init__(self) -> None:
-        self.records: list[dict[str, Any]] = []
+        self.records: deque[dict[str, Any]] = deque(maxlen=32)
 
     async def record_remote_call(
         self,
@@ -194,18 +153,21 @@ class StubTelemetryService:
         )
 
 
-def _configure_settings(tmp_path: Path) -> None:
+@pytest.fixture(scope="module")
+def resilience_settings(tmp_path_factory):
+    """Build the remote-inference settings once for the whole module.
+
+    Nothing is reloaded: tests swap these settings in with ``monkeypatch``,
+    so ``sys.modules`` is left untouched and the module is safe to run
+    under ``pytest -n auto``.
+    """
     _ensure_pydantic_stack()
-    _ensure_httpx_stub()
     _ensure_pil_stub()
 
     from core import config
 
-    importlib.reload(config)
-    config.get_settings.cache_clear()
-
     comfy = config.RemoteServiceSettings(
-        request_timeout_seconds=0.5,
+        request_timeout_seconds=1.0,
         connect_timeout_seconds=0.1,
         read_timeout_seconds=0.1,
         write_timeout_seconds=0.1,
@@ -216,7 +178,7 @@ def _configure_settings(tmp_path: Path) -> None:
         queue_retry_delay_seconds=0.0,
     )
     sadtalker = config.RemoteServiceSettings(
-        request_timeout_seconds=0.5,
+        request_timeout_seconds=1.0,
         connect_timeout_seconds=0.1,
         read_timeout_seconds=0.1,
         write_timeout_seconds=0.1,
@@ -227,11 +189,12 @@ def _configure_settings(tmp_path: Path) -> None:
         queue_retry_delay_seconds=0.0,
     )
 
-    config.settings = config.Settings(
-        media_dir=tmp_path / "media",
-        thumbnail_dir=tmp_path / "thumbnails",
-        models_dir=tmp_path / "models",
-        temp_dir=tmp_path / "tmp",
+    base_dir = tmp_path_factory.mktemp("resilience")
+    return config.Settings(
+        media_dir=base_dir / "media",
+        thumbnail_dir=base_dir / "thumbnails",
+        models_dir=base_dir / "models",
+        temp_dir=base_dir / "tmp",
         comfyui_url="http://comfy.test",
         sadtalker_url="http://sadtalker.test",
         remote_inference=config.RemoteInferenceSettings(
@@ -241,32 +204,50 @@ def _configure_settings(tmp_path: Path) -> None:
     )
 
 
-def test_timeout_triggers_queue(monkeypatch, tmp_path) -> None:
-    asyncio.run(_run_timeout_triggers_queue(monkeypatch, tmp_path))
-
+@pytest.fixture
+def model_manager_module(resilience_settings, monkeypatch, tmp_path):
+    """Install the shared settings, pointed at this test's ``tmp_path``."""
+    from core import config
+    from services import model_manager as module
 
-async def _run_timeout_triggers_queue(monkeypatch, tmp_path) -> None:
     monkeypatch.setenv("SEIDRA_USE_REAL_MODELS", "0")
-    _configure_settings(tmp_path)
-
-    from services import model_manager as model_manager_module
-
-    importlib.reload(model_manager_module)
-    manager = model_manager_module.ModelManager()
+    monkeypatch.setattr(config, "settings", resilience_settings)
+    monkeypatch.setattr(module, "settings", resilience_settings)
+    for field_name, directory in (
+        ("media_dir", "media"),
+        ("thumbnail_dir", "thumbnails"),
+        ("models_dir", "models"),
+        ("temp_dir", "tmp"),
+    ):
+        monkeypatch.setattr(resilience_settings, field_name, tmp_path / directory)
+    return module
+
+
+@pytest.fixture
+async def manager(model_manager_module):
+    """A fresh manager per test, cleaned up even when the test fails."""
+    instance = model_manager_module.ModelManager()
+    yield instance
+    await instance.cleanup()
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    # Share one loop across the module instead of building one per test.
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+async def test_timeout_triggers_queue(manager, monkeypatch, tmp_path) -> None:
     telemetry = StubTelemetryService()
     notifications = StubNotificationService()
     manager.attach_telemetry_service(telemetry)
     manager.attach_notification_service(notifications)
 
-    async def _noop_worker() -> None:
-        return None
-
-    monkeypatch.setattr(manager, "_ensure_retry_worker", _noop_worker)
-
-    async def _failing_request(*_args: Any, **_kwargs: Any):  # noqa: ANN401
-        raise TimeoutError()
-
-    monkeypatch.setattr(manager, "_request_json_with_retries", _failing_request)
+    monkeypatch.setattr(manager, "_ensure_retry_worker", AsyncMock(return_value=None))
+    failing_request = AsyncMock(side_effect=TimeoutError())
+    monkeypatch.setattr(manager, "_request_json_with_retries", failing_request)
 
     with pytest.raises(TimeoutError):
         await manager._generate_image_remote(
@@ -282,55 +263,52 @@ async def _run_timeout_triggers_queue(monkeypatch, tmp_path) -> None:
             media_dir=tmp_path / "media",
         )
 
+    failing_request.assert_awaited_once()
     assert manager._remote_retry_queue.qsize() == 1
-    assert notifications.events, "Une notification de dégradation doit être publiée"
+    assert notifications.levels, "Une notification de dégradation doit être publiée"
     assert telemetry.records and telemetry.records[-1]["success"] is False
 
     queued_job = await manager._remote_retry_queue.get()
     manager._remote_retry_queue.task_done()
     assert getattr(queued_job, "service", None) == "comfyui"
-    await manager.cleanup()
-
-
-def test_retry_worker_completes_job(monkeypatch, tmp_path) -> None:
-    asyncio.run(_run_retry_worker_completes_job(monkeypatch, tmp_path))
-
-
-async def _run_retry_worker_completes_job(monkeypatch, tmp_path) -> None:
-    monkeypatch.setenv("SEIDRA_USE_REAL_MODELS", "0")
-    _configure_settings(tmp_path)
 
-    from services import model_manager as model_manager_module
 
-    importlib.reload(model_manager_module)
-    manager = model_manager_module.ModelManager()
+async def test_retry_worker_completes_job(manager, monkeypatch, tmp_path) -> None:
     telemetry = StubTelemetryService()
     notifications = StubNotificationService()
     manager.attach_telemetry_service(telemetry)
     manager.attach_notification_service(notifications)
 
-    image_payload = base64.b64encode(b"stub-image").decode("ascii")
-    call_state = {"count": 0}
+    failing_request = httpx.Request("POST", "http://comfy.test/api/generate")
+    failing_response = httpx.Response(502, request=failing_request)
+    outcomes = iter(
+        [
+            httpx.HTTPStatusError("boom", request=failing_request, response=failing_response),
+            (
+                {
+                    "images": [
+                        {
+                            "data": _IMAGE_PAYLOAD,
+                            "filename": "retry.png",
+                        }
+                    ],
+                    "metadata": {"status": "ok"},
+                },
+                1,
+            ),
+        ]
+    )
+    retried = asyncio.Event()
 
-    async def _flaky_request(*_args: Any, **_kwargs: Any):  # noqa: ANN401
-        call_state["count"] += 1
-        if call_state["count"] == 1:
-            response = httpx.Response(502, request=httpx.Request("POST", "http://comfy.test/api/generate"))
-            raise httpx.HTTPStatusError("boom", request=response.request, response=response)
-        return (
-            {
-                "images": [
-                    {
-                        "data": image_payload,
-                        "filename": "retry.png",
-                    }
-                ],
-                "metadata": {"status": "ok"},
-            },
-            1,
-        )
+    async def _respond(*_args: Any, **_kwargs: Any):  # noqa: ANN401
+        outcome = next(outcomes)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        retried.set()
+        return outcome
 
-    monkeypatch.setattr(manager, "_request_json_with_retries", _flaky_request)
+    flaky_request = AsyncMock(side_effect=_respond)
+    monkeypatch.setattr(manager, "_request_json_with_retries", flaky_request)
 
     with pytest.raises(httpx.HTTPStatusError):
         await manager._generate_image_remote(
@@ -346,15 +324,16 @@ async def _run_retry_worker_completes_job(monkeypatch, tmp_path) -> None:
             media_dir=tmp_path / "media",
         )
 
+    # Wake as soon as the retry succeeds; the join then only confirms the
+    # worker has marked the job done.
+    await asyncio.wait_for(retried.wait(), timeout=1.0)
     await asyncio.wait_for(manager._remote_retry_queue.join(), timeout=1.0)
 
+    assert flaky_request.await_count == 2
     media_file = tmp_path / "media" / "retry.png"
     assert media_file.exists(), "Le fichier généré doit être présent après reprise"
 
-    levels = [event["level"] for event in notifications.events]
-    assert "warning" in levels and "info" in levels
+    assert "warning" in notifications.levels and "info" in notifications.levels
 
     assert len(telemetry.records) >= 2
     assert any(record["success"] for record in telemetry.records)
-
-    await manager.cleanup()
@@ -1,4 +1,5 @@
 import asyncio
+from collections import deque
 from datetime import datetime, timedelta
 import sys
 import types
@@ -7,119 +8,125 @@ from typing import Any
 
 import pytest
 
-if "alembic" not in sys.modules:
-    alembic_module = types.ModuleType("alembic")
-    alembic_module.command = types.SimpleNamespace(upgrade=lambda *args, **kwargs: None)
-    sys.modules["alembic"] = alembic_module
-    config_module = types.ModuleType("alembic.config")
 
-    class _DummyConfig:  # pragma: no cover - simple stub
-        def __init__(self, *args, **kwargs) -> None:
-            pass
+def _install_stubs() -> None:
+    """Register lightweight stand-ins for optional heavy dependencies."""
+    if "alembic" not in sys.modules:
+        alembic_module = types.ModuleType("alembic")
+        alembic_module.command = types.SimpleNamespace(upgrade=lambda *args, **kwargs: None)
+        sys.modules["alembic"] = alembic_module
+        config_module = types.ModuleType("alembic.config")
 
-        def set_main_option(self, *args, **kwargs) -> None:
-            pass
+        class _DummyConfig:  # pragma: no cover - simple stub
+            def __init__(self, *args, **kwargs) -> None:
+                pass
 
-    config_module.Config = _DummyConfig
-    sys.modules["alembic.config"] = config_module
+            def set_main_option(self, *args, **kwargs) -> None:
+                pass
 
+        config_module.Config = _DummyConfig
+        sys.modules["alembic.config"] = config_module
 
-if "services.database" not in sys.modules:
-    database_module = types.ModuleType("services.database")
+    if "services.database" not in sys.modules:
+        database_module = types.ModuleType("services.database")
 
-    class _PlaceholderDatabaseService:  # pragma: no cover - simple stub
-        def __init__(self, *args, **kwargs) -> None:
-            pass
+        class _PlaceholderDatabaseService:  # pragma: no cover - simple stub
+            def __init__(self, *args, **kwargs) -> None:
+                pass
 
-        def close(self) -> None:
-            pass
+            def close(self) -> None:
+                pass
 
-        def get_platform_summary(self) -> dict[str, Any]:
-            return {}
+            def get_platform_summary(self) -> dict[str, Any]:
+                return {}
 
-        def get_job_statistics(self) -> dict[str, Any]:
-            return {}
+            def get_job_statistics(self) -> dict[str, Any]:
+                return {}
 
-        def get_media_statistics(self) -> dict[str, Any]:
-            return {}
+            def get_media_statistics(self) -> dict[str, Any]:
+                return {}
 
-        def aggregate_generation_metrics(self, **kwargs: Any) -> dict[str, Any]:
-            return {"total": 0, "outputs": 0}
+            def aggregate_generation_metrics(self, **kwargs: Any) -> dict[str, Any]:
+                return {"total": 0, "outputs": 0}
 
-    database_module.DatabaseService = _PlaceholderDatabaseService
-    sys.modules["services.database"] = database_module
+        database_module.DatabaseService = _PlaceholderDatabaseService
+        sys.modules["services.database"] = database_module
 
+    if "psutil" not in sys.modules:
+        psutil_module = types.ModuleType("psutil")
 
-if "psutil" not in sys.modules:
-    psutil_module = types.ModuleType("psutil")
+        def _cpu_percent(interval=None):  # pragma: no cover - stub
+            return 0.0
 
-    def _cpu_percent(interval=None):  # pragma: no cover - stub
-        return 0.0
+        class _VirtualMemory:  # pragma: no cover - stub structure
+            percent = 0.0
+            total = 0
+            available = 0
 
-    class _VirtualMemory:  # pragma: no cover - stub structure
-        percent = 0.0
-        total = 0
-        available = 0
+        def _virtual_memory():
+            return _VirtualMemory()
 
-    def _virtual_memory():
-        return _VirtualMemory()
+        def _boot_time():
+            return 0
 
-    def _boot_time():
-        return 0
+        psutil_module.cpu_percent = _cpu_percent
+        psutil_module.virtual_memory = _virtual_memory
+        psutil_module.boot_time = _boot_time
+        sys.modules["psutil"] = psutil_module
 
-    psutil_module.cpu_percent = _cpu_percent
-    psutil_module.virtual_memory = _virtual_memory
-    psutil_module.boot_time = _boot_time
-    sys.modules["psutil"] = psutil_module
+    if "httpx" not in sys.modules:
+        httpx_module = types.ModuleType("httpx")
 
+        class _AsyncClient:  # pragma: no cover - stub client
+            async def __aenter__(self):
+                return self
 
-if "httpx" not in sys.modules:
-    httpx_module = types.ModuleType("httpx")
+            async def __aexit__(self, exc_type, exc, tb):
+                return False
 
-    class _AsyncClient:  # pragma: no cover - stub client
-        async def __aenter__(self):
-            return self
+            async def get(self, *args, **kwargs):
+                raise RuntimeError("httpx stub: GET not implemented")
 
-        async def __aexit__(self, exc_type, exc, tb):
-            return False
+            async def stream(self, *args, **kwargs):
+                raise RuntimeError("httpx stub: stream not implemented")
 
-        async def get(self, *args, **kwargs):
-            raise RuntimeError("httpx stub: GET not implemented")
+        httpx_module.AsyncClient = _AsyncClient
+        httpx_module.Response = object
+        sys.modules["httpx"] = httpx_module
 
-        async def stream(self, *args, **kwargs):
-            raise RuntimeError("httpx stub: stream not implemented")
+    if "PIL" not in sys.modules:
+        pil_module = types.ModuleType("PIL")
+        image_module = types.ModuleType("PIL.Image")
 
-    httpx_module.AsyncClient = _AsyncClient
-    httpx_module.Response = object
-    sys.modules["httpx"] = httpx_module
+        class _DummyImage:  # pragma: no cover - stub
+            @staticmethod
+            def open(*args, **kwargs):
+                raise RuntimeError("Pillow stub: open not implemented")
 
+        image_module.Image = _DummyImage
+        pil_module.Image = _DummyImage
+        sys.modules["PIL"] = pil_module
+        sys.modules["PIL.Image"] = image_module
 
-if "PIL" not in sys.modules:
-    pil_module = types.ModuleType("PIL")
-    image_module = types.ModuleType("PIL.Image")
+    sys.modules.pop("core.config", None)
+    sys.modules.pop("fastapi", None)
 
-    class _DummyImage:  # pragma: no cover - stub
-        @staticmethod
-        def open(*args, **kwargs):
-            raise RuntimeError("Pillow stub: open not implemented")
 
-    image_module.Image = _DummyImage
-    pil_module.Image = _DummyImage
-    sys.modules["PIL"] = pil_module
-    sys.modules["PIL.Image"] = image_module
+@pytest.fixture(scope="module", autouse=True)
+def telemetry_service_cls():
+    # Stubs are installed on first use rather than at collection time, so
+    # ``-k`` runs and ``--collect-only`` skip them entirely.
+    _install_stubs()
+    from services.telemetry_service import TelemetryService
 
-
-sys.modules.pop("core.config", None)
-sys.modules.pop("fastapi", None)
-
-
-from services.telemetry_service import TelemetryService  # noqa: E402
+    return TelemetryService
 
 
 class DummyDatabaseService:
-    records: list[SimpleNamespace] = []
-
-    def __init__(self) -> None:
+    def __init__(self, records: list[SimpleNamespace] | None = None) -> None:
+        # TelemetryService opens a new session per call, so the fixture hands
+        # every instance the same per-test list.
+        self.records = records if records is not None else []
         self._now = datetime.utcnow()
 
     def get_platform_summary(self) -> dict[str, Any]:
@@ -136,11 +143,11 @@ class DummyDatabaseService:
 
     def create_generation_metric(self, **kwargs: Any) -> SimpleNamespace:
         record = SimpleNamespace(
-            id=len(DummyDatabaseService.records) + 1,
+            id=len(self.records) + 1,
             created_at=self._now,
             **kwargs,
         )
-        DummyDatabaseService.records.append(record)
+        self.records.append(record)
         return record
 
     def serialize_generation_metric(self, record: SimpleNamespace) -> dict[str, Any]:
@@ -169,14 +176,20 @@ class DummyDatabaseService:
         limit: int = 50,
         since_minutes: int | None = None,
         media_type: str | None = None,
+        _ordered: bool = True,
     ) -> list[SimpleNamespace]:
-        items = list(DummyDatabaseService.records)
+        items = self.records
         if since_minutes is not None:
             threshold = self._now - timedelta(minutes=since_minutes)
             items = [item for item in items if item.created_at >= threshold]
         if media_type is not None:
             items = [item for item in items if item.media_type == media_type]
-        return list(reversed(items[:limit]))
+        if not limit:
+            return []
+        # Newest first, like the real query; each slice already copies.
+        if not _ordered:
+            return items[-limit:]
+        return items[-limit:][::-1]
 
     def aggregate_generation_metrics(
         self,
@@ -184,23 +197,44 @@ class DummyDatabaseService:
         since_minutes: int | None = None,
         media_type: str | None = None,
     ) -> dict[str, Any]:
-        items = self.list_generation_metrics(limit=len(DummyDatabaseService.records), since_minutes=since_minutes, media_type=media_type)
-        durations = [item.duration_seconds for item in items if item.duration_seconds is not None]
-        throughput = [item.throughput for item in items if item.throughput is not None]
-        vram_peaks = [item.vram_peak_mb for item in items if item.vram_peak_mb is not None]
-        vram_deltas = [item.vram_delta_mb for item in items if item.vram_delta_mb is not None]
-        outputs = [item.outputs for item in items if item.outputs is not None]
+        # Ordering is irrelevant for the aggregates, so skip the reversal.
+        items = self.list_generation_metrics(
+            limit=len(self.records),
+            since_minutes=since_minutes,
+            media_type=media_type,
+            _ordered=False,
+        )
+        dur_sum = thr_sum = peak_sum = delta_sum = 0.0
+        dur_n = thr_n = peak_n = delta_n = 0
+        outputs = 0
+        for item in items:
+            if item.duration_seconds is not None:
+                dur_sum += item.duration_seconds
+                dur_n += 1
+            if item.throughput is not None:
+                thr_sum += item.throughput
+                thr_n += 1
+            if item.vram_peak_mb is not None:
+                peak_sum += item.vram_peak_mb
+                peak_n += 1
+            if item.vram_delta_mb is not None:
+                delta_sum += item.vram_delta_mb
+                delta_n += 1
+            if item.outputs is not None:
+                outputs += item.outputs
         return {
             "total": len(items),
-            "averageDurationSeconds": sum(durations) / len(durations) if durations else None,
-            "averageThroughput": sum(throughput) / len(throughput) if throughput else None,
-            "averagePeakVramMb": sum(vram_peaks) / len(vram_peaks) if vram_peaks else None,
-            "averageDeltaVramMb": sum(vram_deltas) / len(vram_deltas) if vram_deltas else None,
-            "outputs": sum(outputs) if outputs else 0,
+            "averageDurationSeconds": dur_sum / dur_n if dur_n else None,
+            "averageThroughput": thr_sum / thr_n if thr_n else None,
+            "averagePeakVramMb": peak_sum / peak_n if peak_n else None,
+            "averageDeltaVramMb": delta_sum / delta_n if delta_n else None,
+            "outputs": outputs,
         }
 
 
 class DummyGPU:
+    __slots__ = ("current_status", "_durations", "_duration_sum")
+
     def __init__(self) -> None:
         self.current_status = {
             "gpu_available": True,
@@ -215,7 +249,8 @@ class DummyGPU:
             "cuda_error_count": 0,
             "cuda_errors": [],
         }
-        self._durations: list[float] = []
+        self._durations: deque[float] = deque(maxlen=256)
+        self._duration_sum = 0.0
 
     async def get_status(self) -> dict[str, Any]:
         return dict(self.current_status)
@@ -232,9 +267,11 @@ class DummyGPU:
         vram_peak: float | None = None,
     ) -> None:
         if duration is not None:
+            if len(self._durations) == self._durations.maxlen:
+                self._duration_sum -= self._durations[0]
             self._durations.append(duration)
-            avg = sum(self._durations) / len(self._durations)
-            self.current_status["inference_avg_seconds"] = avg
+            self._duration_sum += duration
+            self.current_status["inference_avg_seconds"] = self.get_average_inference_time()
             self.current_status["inference_samples"] = len(self._durations)
         if vram_peak is not None:
             self.current_status["last_generation_vram_peak_mb"] = vram_peak
@@ -244,7 +281,7 @@ class DummyGPU:
     def get_average_inference_time(self) -> float | None:
         if not self._durations:
             return None
-        return sum(self._durations) / len(self._durations)
+        return self._duration_sum / len(self._durations)
 
     def get_cuda_error_stats(self) -> dict[str, Any]:
         return {
@@ -254,6 +291,8 @@ class DummyGPU:
 
 
 class DummyWebSocket:
+    __slots__ = ("messages",)
+
     def __init__(self) -> None:
         self.messages: list[dict[str, Any]] = []
 
@@ -261,20 +300,27 @@ class DummyWebSocket:
         self.messages.append(message)
 
 
+@pytest.fixture
+def telemetry_factory(telemetry_service_cls):
+    def make(**overrides: Any):
+        options: dict[str, Any] = {"gpu_monitor": DummyGPU(), "websocket_manager": DummyWebSocket()}
+        options.update(overrides)
+        return telemetry_service_cls(**options)
+
+    return make
+
+
 @pytest.fixture(autouse=True)
-def patch_database(monkeypatch: pytest.MonkeyPatch):
+def patch_database(monkeypatch: pytest.MonkeyPatch, telemetry_service_cls):
     from services import telemetry_service as telemetry_module
 
-    DummyDatabaseService.records.clear()
-    monkeypatch.setattr(telemetry_module, "DatabaseService", DummyDatabaseService)
-    yield
-    DummyDatabaseService.records.clear()
+    records: list[SimpleNamespace] = []
+    monkeypatch.setattr(telemetry_module, "DatabaseService", lambda: DummyDatabaseService(records))
 
 
-def test_record_generation_metric_enriches_recent_metrics():
-    gpu = DummyGPU()
-    websocket = DummyWebSocket()
-    service = TelemetryService(gpu_monitor=gpu, websocket_manager=websocket)
+def test_record_generation_metric_enriches_recent_metrics(telemetry_factory):
+    service = telemetry_factory()
+    websocket = service.websocket_manager
 
     metric_payload = {
         "job_id": "job-1",
@@ -304,9 +350,8 @@ def test_record_generation_metric_enriches_recent_metrics():
     assert websocket.messages and websocket.messages[0]["payload"] == enriched
 
 
-def test_collect_snapshot_includes_gpu_and_generation_metrics():
-    gpu = DummyGPU()
-    service = TelemetryService(gpu_monitor=gpu)
+def test_collect_snapshot_includes_gpu_and_generation_metrics(telemetry_factory):
+    service = telemetry_factory(websocket_manager=None)
 
     asyncio.run(
         service.record_generation_metric(
@@ -337,3 +382,45 @@ def test_collect_snapshot_includes_gpu_and_generation_metrics():
     latest_generation = snapshot["generation"]["recent"][0]
     assert latest_generation["latencySeconds"] == pytest.approx(2.0)
     assert snapshot["generation"]["rollingLatencySeconds"] == pytest.approx(2.0)
+
+
+def test_prepare_broadcast_sends_deltas_between_keyframes(telemetry_factory):
+    service = telemetry_factory(keyframe_interval=3)
+
+    first = {"timestamp": "t1", "platform": {"users": 1}, "gpu": {"temperature": 60}}
+    data, is_delta = service._prepare_broadcast(first)
+    assert data == first and is_delta is False
+
+    second = {"timestamp": "t2", "platform": {"users": 1}, "gpu": {"temperature": 61}}
+    data, is_delta = service._prepare_broadcast(second)
+    assert is_delta is True
+    assert data == {"timestamp": "t2", "gpu": {"temperature": 61}}
+
+    third = {"timestamp": "t3", "platform": {"users": 1}, "gpu": {"temperature": 61}}
+    data, is_delta = service._prepare_broadcast(third)
+    assert data == {"timestamp": "t3"}
+
+    fourth = {"timestamp": "t4", "platform": {"users": 1}, "gpu": {"temperature": 61}}
+    data, is_delta = service._prepare_broadcast(fourth)
+    assert is_delta is False and data == fourth
+    assert service._broadcast_seq == 4
+
+
+def test_current_keyframe_tracks_merged_state(telemetry_factory):
+    service = telemetry_factory(keyframe_interval=3)
+    assert service.current_keyframe() is None
+
+    service._prepare_broadcast({"timestamp": "t1", "gpu": {"temperature": 60}})
+    service._prepare_broadcast({"timestamp": "t2", "gpu": {"temperature": 61}})
+
+    assert service.current_keyframe() == ({"timestamp": "t2", "gpu": {"temperature": 61}}, 2)
+
+
+def test_prepare_broadcast_sends_tombstones_for_removed_keys(telemetry_factory):
+    service = telemetry_factory(keyframe_interval=10)
+    service._prepare_broadcast({"timestamp": "t1", "gpu": {"temperature": 60}, "remote": {"ok": True}})
+
+    data, is_delta = service._prepare_broadcast({"timestamp": "t2", "gpu": {"temperature": 60}})
+
+    assert is_delta is True
+    assert data == {"timestamp": "t2", "remote": None}
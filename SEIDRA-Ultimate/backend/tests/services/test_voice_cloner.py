@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import shutil
+import sys
+import types
+
+import numpy as np
+import pytest
+from services.voice_cloner import VoiceCloner
+
+
+@pytest.fixture
+def cloner_factory(tmp_path, monkeypatch):
+    # VoiceCloner resolves its directories relative to ``..``.
+    workdir = tmp_path / "backend"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    created: list[VoiceCloner] = []
+
+    def factory() -> VoiceCloner:
+        cloner = VoiceCloner()
+        created.append(cloner)
+        return cloner
+
+    yield factory
+    for cloner in created:
+        cloner._executor.shutdown(wait=False)
+
+
+async def test_sample_cache_round_trips_through_disk(cloner_factory):
+    cloner = cloner_factory()
+    cloner._get_cached_sample("first")["valid"] = True
+    cloner._get_cached_sample("second").update(valid=False, features={"pitch_mean": 180.5})
+    await cloner._save_sample_cache()
+
+    restored = cloner_factory()
+    await restored._load_sample_cache()
+
+    assert isinstance(restored._sample_cache, OrderedDict)
+    assert list(restored._sample_cache) == ["first", "second"]
+    assert restored._sample_cache["second"] == {"valid": False, "features": {"pitch_mean": 180.5}}
+    assert not cloner.sample_cache_path.with_suffix(".json.tmp").exists()
+
+
+def test_sample_cache_evicts_least_recently_used(cloner_factory, tmp_path):
+    cloner = cloner_factory()
+    cloner.sample_cache_size = 2
+    sample = tmp_path / "sample.wav"
+    sample.write_bytes(b"voice")
+
+    digest = cloner._digest(str(sample))
+    assert cloner._digest(str(sample)) == digest
+    sample.write_bytes(b"other voice")
+    assert cloner._digest(str(sample)) != digest
+
+    cloner._get_cached_sample("a")
+    cloner._get_cached_sample("b")
+    cloner._get_cached_sample("a")
+    cloner._get_cached_sample("c")
+
+    assert list(cloner._sample_cache) == ["a", "c"]
+
+
+def test_post_process_applies_gain_to_wav_in_place(cloner_factory, tmp_path):
+    sf = pytest.importorskip("soundfile")
+    pytest.importorskip("torchaudio")
+
+    cloner = cloner_factory()
+    audio_path = tmp_path / "clone.wav"
+    sf.write(str(audio_path), np.array([0.0, 0.25, -0.5, 0.9], dtype=np.float32), 22050, subtype="PCM_16")
+    emotion = {"speed": 1.0, "energy": 1.5, "needs_speed": False, "needs_gain": True}
+
+    result = cloner._post_process_sync(str(audio_path), emotion, "wav")
+
+    assert result == str(audio_path)
+    audio, sr = sf.read(result, dtype="float32")
+    assert sr == 22050
+    np.testing.assert_allclose(audio, [0.0, 0.375, -0.75, 1.0], atol=1e-3)
+
+
+def test_numba_preemphasis_handles_empty_input():
+    pytest.importorskip("numba")
+    from services.voice_cloner import _get_numba_normalize_preemphasis
+
+    kernel = _get_numba_normalize_preemphasis()
+
+    assert kernel(np.empty(0, dtype=np.float32)).size == 0
+    np.testing.assert_allclose(kernel(np.array([0.5, 1.0], dtype=np.float32)), [0.5, 0.515], atol=1e-6)
+
+
+@pytest.mark.parametrize("output_format", ["flac", "weird"])
+def test_post_process_writes_wav_for_formats_without_encoder(
+    cloner_factory, tmp_path, monkeypatch, output_format
+):
+    saved: list[tuple[str, dict]] = []
+    torchaudio = types.ModuleType("torchaudio")
+    torchaudio.load = lambda path: (np.zeros((1, 4), dtype=np.float32), 16000)
+    torchaudio.save = lambda path, waveform, sr, **kwargs: saved.append((path, kwargs))
+    monkeypatch.setitem(sys.modules, "torchaudio", torchaudio)
+    monkeypatch.setitem(sys.modules, "soundfile", types.ModuleType("soundfile"))
+
+    cloner = cloner_factory()
+    emotion = {"speed": 1.0, "energy": 1.0, "needs_speed": False, "needs_gain": False}
+    source = tmp_path / "clone.mp3"
+
+    result = cloner._post_process_sync(str(source), emotion, output_format)
+
+    assert result == str(tmp_path / "clone.wav")
+    assert saved == [(result, {"format": "wav", "bits_per_sample": 16})]
+
+
+def _tone(cloner: VoiceCloner, frequency: float, seconds: float, amplitude: float = 0.5):
+    torch = pytest.importorskip("torch")
+    t = torch.arange(int(cloner.feature_sample_rate * seconds)) / cloner.feature_sample_rate
+    return amplitude * torch.sin(2 * np.pi * frequency * t)
+
+
+def test_batch_features_match_single_sample_features(cloner_factory):
+    pytest.importorskip("torchaudio")
+    cloner = cloner_factory()
+    waveforms = [
+        _tone(cloner, 220, 1.0),
+        _tone(cloner, 150, 0.6, amplitude=0.05),
+        _tone(cloner, 300, 0.35),
+    ]
+
+    batched = cloner._compute_batch_features(waveforms)
+
+    for index, (waveform, features) in enumerate(zip(waveforms, batched, strict=True)):
+        single = cloner._compute_batch_features([waveform])[0]
+        assert features["pitch_mean"] == pytest.approx(single["pitch_mean"])
+        assert features["pitch_std"] == pytest.approx(single["pitch_std"], abs=1e-3)
+        # Padding only reaches the STFT window of a shorter sample's last frame.
+        tolerance = 1e-3 if index == 0 else 0.03
+        assert features["spectral_centroid"] == pytest.approx(single["spectral_centroid"], rel=tolerance)
+        mfcc_scale = float(np.max(np.abs(single["mfcc"])))
+        np.testing.assert_allclose(features["mfcc"], single["mfcc"], atol=tolerance * mfcc_scale)
+
+
+@pytest.mark.parametrize("rate", [0.8, 1.25])
+def test_time_stretch_scales_length_by_rate(cloner_factory, rate):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("torchaudio")
+    cloner = cloner_factory()
+    waveform = torch.randn(2, 22050) * 0.1
+
+    stretched = cloner._time_stretch(waveform, rate)
+
+    assert stretched.shape == (2, round(22050 / rate))
+    assert torch.isfinite(stretched).all()
+
+
+def test_numba_and_torchscript_preemphasis_agree():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("numba")
+    from services.voice_cloner import _get_normalize_preemphasis, _get_numba_normalize_preemphasis
+
+    samples = np.random.default_rng(0).uniform(-0.4, 0.4, 512).astype(np.float32)
+
+    expected = _get_normalize_preemphasis()(torch.from_numpy(samples)).numpy()
+    np.testing.assert_allclose(_get_numba_normalize_preemphasis()(samples), expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("output_format", ["mp3", "ogg"])
+def test_encode_in_process_writes_decodable_audio(cloner_factory, tmp_path, output_format):
+    av = pytest.importorskip("av")
+    cloner = cloner_factory()
+    output_path = tmp_path / f"clone.{output_format}"
+
+    assert cloner._encode_in_process(_tone(cloner, 220, 1.0).unsqueeze(0), 22050, output_path, output_format)
+
+    with av.open(str(output_path)) as container:
+        stream = container.streams.audio[0]
+        decoded = sum(frame.samples for frame in container.decode(stream))
+        assert stream.codec_context.sample_rate == 22050
+    # Encoder priming and padding add at most a few frames.
+    assert abs(decoded - 22050) < 4096
+
+
+def test_post_process_falls_back_to_pydub_without_pyav(cloner_factory, tmp_path, monkeypatch):
+    sf = pytest.importorskip("soundfile")
+    pytest.importorskip("torchaudio")
+    monkeypatch.setitem(sys.modules, "av", None)  # importing av now raises ImportError
+    cloner = cloner_factory()
+    calls: list[tuple[str, int, str]] = []
+    monkeypatch.setattr(
+        cloner,
+        "_encode_with_pydub",
+        lambda waveform, sr, path, fmt: calls.append((str(path), sr, fmt)),
+    )
+    audio_path = tmp_path / "clone.wav"
+    sf.write(str(audio_path), np.full(2205, 0.25, dtype=np.float32), 22050, subtype="PCM_16")
+    emotion = {"speed": 1.0, "energy": 1.2, "needs_speed": False, "needs_gain": True}
+
+    result = cloner._post_process_sync(str(audio_path), emotion, "mp3")
+
+    assert result == str(tmp_path / "clone.mp3")
+    assert calls == [(result, 22050, "mp3")]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="pydub needs ffmpeg to encode mp3")
+def test_encode_with_pydub_exports_mp3(cloner_factory, tmp_path):
+    pytest.importorskip("pydub")
+    cloner = cloner_factory()
+    output_path = tmp_path / "clone.mp3"
+
+    cloner._encode_with_pydub(_tone(cloner, 220, 0.5).unsqueeze(0), 22050, output_path, "mp3")
+
+    assert output_path.stat().st_size > 0
+    assert not (tmp_path / "clone_processed.wav").exists()
@@ -0,0 +1,571 @@
+import asyncio
+from datetime import datetime, timedelta
+import json
+from typing import Any
+import zlib
+
+import pytest
+from services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, *, fail: bool = False) -> None:
+        self.fail = fail
+        self.accepted = False
+        self.closed = False
+        self.sent: list[str | bytes] = []
+
+    async def accept(self) -> None:
+        self.accepted = True
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+    async def send_text(self, text: str) -> None:
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(data)
+
+    def messages(self) -> list[dict[str, Any]]:
+        decoded: list[dict[str, Any]] = []
+        for text in self.sent:
+            if isinstance(text, bytes):
+                text = zlib.decompress(text).decode()
+            frame = json.loads(text)
+            decoded.extend(frame if isinstance(frame, list) else [frame])
+        return decoded
+
+
+def subscriber_ids(manager: WebSocketManager, channel: str) -> list[str]:
+    clients = {state.handle: client_id for client_id, state in manager.active_connections.items()}
+    return [clients[handle] for handle in manager.channel_index.get(channel, ())]
+
+
+async def drain() -> None:
+    # Let the writer tasks empty their queues.
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def test_dispatch_event_encodes_once_and_drops_failed_clients(monkeypatch):
+    from services import websocket_manager as websocket_module
+
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        healthy = FakeWebSocket()
+        broken = FakeWebSocket()
+        await manager.connect(healthy, "healthy", user_id=1)
+        await manager.connect(broken, "broken", user_id=2)
+        await drain()
+        broken.fail = True
+
+        calls = []
+        original_encode = websocket_module._encode
+
+        def counting_encode(payload: Any) -> str:
+            calls.append(payload)
+            return original_encode(payload)
+
+        monkeypatch.setattr(websocket_module, "_encode", counting_encode)
+        await manager.dispatch_event({"type": "system_status", "data": {}}, channels={"system"})
+        await drain()
+
+        assert len(calls) == 1
+        assert healthy.messages()[-1]["type"] == "system_status"
+        assert "broken" not in manager.active_connections
+        assert "broken" not in subscriber_ids(manager, "system")
+        assert 2 not in manager.user_connections
+
+    asyncio.run(scenario())
+
+
+def test_dispatch_event_targets_user_connections_on_channel():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        owner = FakeWebSocket()
+        other = FakeWebSocket()
+        await manager.connect(owner, "owner", user_id=1, channels={"jobs"})
+        await manager.connect(other, "other", user_id=2, channels={"jobs"})
+
+        await manager.send_generation_progress("job-1", 0.5, 1)
+        await drain()
+
+        assert [message["type"] for message in owner.messages()] == [
+            "connection",
+            "generation_progress",
+        ]
+        assert [message["type"] for message in other.messages()] == ["connection"]
+        assert owner.messages()[-1]["timestamp"]
+
+    asyncio.run(scenario())
+
+
+def test_dispatch_event_deduplicates_multi_channel_and_broadcasts():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        both = FakeWebSocket()
+        jobs_only = FakeWebSocket()
+        await manager.connect(both, "both", user_id=1, channels={"jobs", "system"})
+        await manager.connect(jobs_only, "jobs-only", user_id=2, channels={"jobs"})
+
+        await manager.dispatch_event({"type": "multi"}, channels={"jobs", "system"})
+        await manager.dispatch_event({"type": "everyone"})
+        await drain()
+
+        for websocket in (both, jobs_only):
+            assert [message["type"] for message in websocket.messages()] == [
+                "connection",
+                "multi",
+                "everyone",
+            ]
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_does_not_block_other_recipients():
+    class BlockedWebSocket(FakeWebSocket):
+        def __init__(self) -> None:
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def send_text(self, text: str) -> None:
+            await self.release.wait()
+            await super().send_text(text)
+
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        slow = BlockedWebSocket()
+        fast = FakeWebSocket()
+        await manager.connect(slow, "slow", user_id=1)
+        await manager.connect(fast, "fast", user_id=2)
+
+        await manager.dispatch_event({"type": "system_status", "data": {}}, channels={"system"})
+        await drain()
+
+        assert [message["type"] for message in fast.messages()] == ["connection", "system_status"]
+        assert slow.sent == []
+
+        slow.release.set()
+        await drain()
+        assert [message["type"] for message in slow.messages()] == ["connection", "system_status"]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_drops_oldest_message():
+    class BlockedWebSocket(FakeWebSocket):
+        def __init__(self) -> None:
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def send_text(self, text: str) -> None:
+            await self.release.wait()
+            await super().send_text(text)
+
+    async def scenario() -> None:
+        manager = WebSocketManager(queue_size=2)
+        websocket = BlockedWebSocket()
+        await manager.connect(websocket, "client", user_id=1, channels={"jobs"})
+        await drain()
+
+        for step in range(4):
+            await manager.send_generation_progress("job-1", step / 4, 1)
+
+        websocket.release.set()
+        await drain()
+
+        progress = [message["progress"] for message in websocket.messages() if message["type"] == "generation_progress"]
+        assert progress == [0.5, 0.75]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_keeps_critical_frames_and_evicts_slow_consumer():
+    class BlockedWebSocket(FakeWebSocket):
+        def __init__(self) -> None:
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def send_text(self, text: str) -> None:
+            await self.release.wait()
+            await super().send_text(text)
+
+    async def fill(manager: WebSocketManager, websocket: BlockedWebSocket) -> None:
+        await manager.connect(websocket, "client", user_id=1, channels={"jobs"})
+        await drain()
+        await manager.send_generation_progress("job-1", 0.5, 1)
+        await manager.send_generation_complete("job-1", ["a.png"], 1)
+        await manager.send_generation_complete("job-2", ["b.png"], 1)
+        await manager.send_generation_progress("job-3", 0.5, 1)
+
+    async def scenario() -> None:
+        manager = WebSocketManager(queue_size=2)
+        websocket = BlockedWebSocket()
+        await fill(manager, websocket)
+        websocket.release.set()
+        await drain()
+
+        delivered = [(message["type"], message.get("jobId")) for message in websocket.messages()]
+        assert delivered == [
+            ("connection", None),
+            ("generation_complete", "job-1"),
+            ("generation_complete", "job-2"),
+        ]
+
+        manager = WebSocketManager(queue_size=2)
+        websocket = BlockedWebSocket()
+        await fill(manager, websocket)
+        await manager.send_generation_error("job-3", "boom", 1)
+        await drain()
+
+        assert "client" not in manager.active_connections
+        assert websocket.closed
+
+    asyncio.run(scenario())
+
+
+def test_queued_messages_are_coalesced_into_one_frame():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=1, channels={"jobs"})
+        await drain()
+        websocket.sent.clear()
+
+        for step in range(3):
+            await manager.send_generation_progress("job-1", step / 3, 1)
+        await drain()
+
+        assert len(websocket.sent) == 1
+        frame = json.loads(websocket.sent[0])
+        assert [message["progress"] for message in frame] == [0, 1 / 3, 2 / 3]
+
+    asyncio.run(scenario())
+
+
+def test_coalesced_frames_respect_batch_cap():
+    async def scenario() -> None:
+        manager = WebSocketManager(max_batch_size=2)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=1, channels={"jobs"})
+        await drain()
+        websocket.sent.clear()
+
+        for step in range(3):
+            await manager.send_generation_progress("job-1", step / 3, 1)
+        await drain()
+
+        assert [len(json.loads(text)) if text.startswith("[") else 1 for text in websocket.sent] == [2, 1]
+
+    asyncio.run(scenario())
+
+
+def test_subscription_ack_reflects_updated_channels():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=1, channels={"system"})
+
+        await manager.handle_client_message("client", {"type": "subscribe", "channels": ["jobs"]})
+        await manager.handle_client_message("client", {"type": "unsubscribe", "channels": ["system"]})
+        await drain()
+
+        acks = [message["channels"] for message in websocket.messages() if message["type"] == "subscription_ack"]
+        assert acks == [["jobs", "system"], ["jobs"]]
+        assert manager.get_connection_stats(verbose=True)["clients"][0]["channels"] == ["jobs"]
+        assert "clients" not in manager.get_connection_stats()
+
+    asyncio.run(scenario())
+
+
+def test_clients_joining_system_channel_receive_full_snapshot():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        manager.attach_system_status_provider(lambda: ({"gpu": {"temperature": 61}}, 7))
+        on_connect = FakeWebSocket()
+        late = FakeWebSocket()
+        await manager.connect(on_connect, "on-connect", user_id=1)
+        await manager.connect(late, "late", user_id=2, channels={"jobs"})
+
+        await manager.handle_client_message("late", {"type": "subscribe", "channels": ["system"]})
+        await manager.handle_client_message("late", {"type": "subscribe", "channels": ["system"]})
+        await drain()
+
+        for websocket in (on_connect, late):
+            snapshots = [message for message in websocket.messages() if message["type"] == "system_status"]
+            assert len(snapshots) == 1
+            assert snapshots[0]["data"] == {"gpu": {"temperature": 61}}
+            assert snapshots[0]["seq"] == 7 and snapshots[0]["delta"] is False
+
+    asyncio.run(scenario())
+
+
+def test_resync_resends_system_keyframe_to_subscribers_only():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        manager.attach_system_status_provider(lambda: ({"gpu": {"temperature": 62}}, 9))
+        subscriber = FakeWebSocket()
+        outsider = FakeWebSocket()
+        await manager.connect(subscriber, "subscriber", user_id=1, channels={"system"})
+        await manager.connect(outsider, "outsider", user_id=2, channels={"jobs"})
+
+        for client_id in ("subscriber", "outsider"):
+            await manager.handle_client_message(client_id, {"type": "resync"})
+        await drain()
+
+        snapshots = [message for message in subscriber.messages() if message["type"] == "system_status"]
+        assert [(message["seq"], message["delta"]) for message in snapshots] == [(9, False), (9, False)]
+        assert [message["type"] for message in outsider.messages()] == ["connection"]
+
+    asyncio.run(scenario())
+
+
+def test_large_fan_out_is_compressed_once():
+    async def scenario() -> None:
+        manager = WebSocketManager(compress_min_recipients=2, compress_min_bytes=128)
+        first = FakeWebSocket()
+        second = FakeWebSocket()
+        await manager.connect(first, "first", user_id=1, channels={"system"})
+        await manager.connect(second, "second", user_id=2, channels={"system"})
+        await drain()
+
+        await manager.send_system_status({"gpu": "x" * 128})
+        await manager.send_system_status({"gpu": "ok"})
+        await drain()
+
+        assert isinstance(first.sent[-2], bytes)
+        assert first.sent[-2] is second.sent[-2]
+        assert isinstance(first.sent[-1], str)
+        assert [message["data"]["gpu"] for message in first.messages()[1:]] == ["x" * 128, "ok"]
+
+    asyncio.run(scenario())
+
+
+def test_channel_index_swap_removes_on_churn():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        for client_id in ("a", "b", "c"):
+            await manager.connect(FakeWebSocket(), client_id, channels={"jobs"})
+
+        await manager.handle_client_message("c", {"type": "subscribe", "channels": ["jobs"]})
+        manager.disconnect("a")
+        assert subscriber_ids(manager, "jobs") == ["c", "b"]
+
+        await manager.handle_client_message("b", {"type": "unsubscribe", "channels": ["jobs"]})
+        manager.disconnect("c")
+        assert "jobs" not in manager.channel_index
+
+    asyncio.run(scenario())
+
+
+def test_publish_progress_sync_queues_without_awaiting():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=7, channels={"jobs"})
+
+        manager.publish_progress_sync("job-9", 0.25, 7, message="denoising")
+        await drain()
+
+        progress = websocket.messages()[-1]
+        assert progress["type"] == "generation_progress"
+        assert (progress["jobId"], progress["progress"], progress["message"]) == ("job-9", 0.25, "denoising")
+
+    asyncio.run(scenario())
+
+
+def test_publish_does_not_stamp_the_callers_message():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=7, channels={"system"})
+
+        message = {"type": "announcement", "text": "maintenance"}
+        manager.publish(message, channels={"system"})
+        manager.publish({"type": "announcement", "timestamp": "fixed"}, channels={"system"})
+        await drain()
+
+        assert message == {"type": "announcement", "text": "maintenance"}
+        announcements = [frame for frame in websocket.messages() if frame["type"] == "announcement"]
+        assert announcements[0]["timestamp"]
+        assert announcements[1]["timestamp"] == "fixed"
+
+    asyncio.run(scenario())
+
+
+def test_client_commands_are_routed_to_handlers():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=1)
+
+        for command in ("ping", "heartbeat", "bogus"):
+            await manager.handle_client_message("client", {"type": command})
+        await drain()
+
+        replies = websocket.messages()[1:]
+        assert [message["type"] for message in replies] == ["pong", "pong", "error"]
+        assert replies[0]["timestamp"]
+        assert replies[2]["message"] == "Unknown command: bogus"
+
+    asyncio.run(scenario())
+
+
+def test_non_string_command_type_gets_error_reply():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=1)
+
+        for command in (["ping"], {"name": "ping"}, None):
+            await manager.handle_client_message("client", {"type": command})
+        await drain()
+
+        replies = websocket.messages()[1:]
+        assert [message["type"] for message in replies] == ["error"] * 3
+        assert replies[0]["message"] == "Invalid command: 'type' must be a string"
+        assert "client" in manager.active_connections
+
+    asyncio.run(scenario())
+
+
+def test_pongs_within_a_second_reuse_the_same_frame(monkeypatch):
+    from services import websocket_manager as websocket_module
+
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        await manager.connect(FakeWebSocket(), "client", user_id=1)
+        frames = []
+        monkeypatch.setattr(manager, "_enqueue", lambda client_id, state, frame: frames.append(frame))
+        monkeypatch.setattr(websocket_module.time, "time", lambda: 1_700_000_000.5)
+
+        await manager.handle_client_message("client", {"type": "ping"})
+        await manager.handle_client_message("client", {"type": "heartbeat"})
+
+        assert frames[0] is frames[1]
+        assert json.loads(frames[0]) == {"type": "pong", "timestamp": "2023-11-14T22:13:20"}
+
+    asyncio.run(scenario())
+
+
+def test_reaper_pings_idle_clients_and_drops_silent_ones():
+    async def scenario() -> None:
+        manager = WebSocketManager(heartbeat_timeout=60, ping_after=25)
+        idle = FakeWebSocket()
+        silent = FakeWebSocket()
+        await manager.connect(idle, "idle", user_id=1, channels={"jobs"})
+        await manager.connect(silent, "silent", user_id=2, channels={"jobs"})
+        now = datetime.utcnow()
+        manager.active_connections["idle"].last_seen = now - timedelta(seconds=30)
+        manager.active_connections["silent"].last_seen = now - timedelta(seconds=90)
+
+        reaped = await manager.reap_stale_connections(now)
+        await drain()
+
+        assert reaped == ["silent"]
+        assert silent.closed
+        assert subscriber_ids(manager, "jobs") == ["idle"]
+        assert idle.messages()[-1] == {"type": "ping"}
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_with_same_id_replaces_previous_connection():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        old = FakeWebSocket()
+        new = FakeWebSocket()
+        await manager.connect(old, "tab", user_id=1, channels={"jobs"})
+        await manager.connect(new, "tab", user_id=1, channels={"jobs"})
+
+        await manager.send_generation_progress("job-1", 0.5, 1)
+        await drain()
+
+        assert "generation_progress" not in [message["type"] for message in old.messages()]
+        assert [message["type"] for message in new.messages()] == ["connection", "generation_progress"]
+        assert len(manager.user_connections[1]) == 1
+
+    asyncio.run(scenario())
+
+
+def test_stop_closes_every_socket_even_when_one_close_fails():
+    class BrokenCloseWebSocket(FakeWebSocket):
+        async def close(self, code: int = 1000) -> None:
+            raise RuntimeError("already gone")
+
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        broken = BrokenCloseWebSocket()
+        healthy = FakeWebSocket()
+        await manager.start()
+        await manager.connect(broken, "broken", user_id=1)
+        await manager.connect(healthy, "healthy", user_id=2)
+
+        await manager.stop()
+
+        assert healthy.closed
+        assert manager.active_connections == {}
+
+    asyncio.run(scenario())
+
+
+def test_default_channels_are_shared_until_subscriptions_change():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        first = FakeWebSocket()
+        second = FakeWebSocket()
+        await manager.connect(first, "first")
+        await manager.connect(second, "second")
+        assert manager.active_connections["first"].channels is manager.default_channels
+
+        await manager.handle_client_message("first", {"type": "unsubscribe", "channels": ["system"]})
+        await drain()
+
+        assert manager.default_channels == {"jobs", "system", "notifications"}
+        assert manager.active_connections["first"].channels == {"jobs", "notifications"}
+        assert first.messages()[0]["channels"] == ["jobs", "notifications", "system"]
+        assert subscriber_ids(manager, "system") == ["second"]
+
+    asyncio.run(scenario())
+
+
+def test_progress_template_matches_encoded_payload():
+    async def scenario() -> None:
+        manager = WebSocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "client", user_id=3, channels={"jobs"})
+
+        metadata = {"step": 4, "note": 'quoted "text"'}
+        await manager.send_generation_progress("job-\"7\"", 0.125, 3, status="running", message="é", metadata=metadata)
+        await drain()
+
+        progress = websocket.messages()[-1]
+        assert progress.pop("timestamp")
+        assert progress == {
+            "type": "generation_progress",
+            "jobId": 'job-"7"',
+            "progress": 0.125,
+            "status": "running",
+            "message": "é",
+            "metadata": metadata,
+        }
+
+    asyncio.run(scenario())
+
+
+def test_encode_accepts_numpy_scalars_and_unknown_objects():
+    from services.websocket_manager import _encode
+
+    numpy = pytest.importorskip("numpy")
+
+    payload = {"temperature": numpy.float64(61.5), "count": numpy.int64(3)}
+    assert json.loads(_encode(payload)) == {"temperature": 61.5, "count": 3}
+    assert json.loads(_encode({"when": datetime(2024, 1, 1).date(), "big": 2**70})) == {
+        "when": "2024-01-01",
+        "big": 2**70,
+    }
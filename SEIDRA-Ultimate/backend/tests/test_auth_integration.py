@@ -4,16 +4,23 @@ from api import auth as auth_module
 from api.settings_models import DEFAULT_SETTINGS
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+import pytest
 
 
-def test_get_me_returns_system_user_when_fallback_enabled(monkeypatch):
-    monkeypatch.setattr(auth_module.settings, "allow_system_fallback", True, raising=False)
-
+@pytest.fixture(scope="module")
+def client():
+    # The router is stateless; per-test behaviour is swapped in with monkeypatch.
     app = FastAPI()
     app.include_router(auth_module.router, prefix="/api/auth")
 
-    with TestClient(app) as client:
-        response = client.get("/api/auth/me")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_get_me_returns_system_user_when_fallback_enabled(client, monkeypatch):
+    monkeypatch.setattr(auth_module.settings, "allow_system_fallback", True, raising=False)
+
+    response = client.get("/api/auth/me")
 
     assert response.status_code == 200
 
@@ -26,11 +33,10 @@ def test_get_me_returns_system_user_when_fallback_enabled(monkeypatch):
     assert payload["settings"] == DEFAULT_SETTINGS
 
 
-def test_register_user_with_existing_email_returns_400(monkeypatch):
-    app = FastAPI()
-    app.include_router(auth_module.router, prefix="/api/auth")
-
+def test_register_user_with_existing_email_returns_400(client, monkeypatch):
     class DummyUser:
+        __slots__ = ("id", "username", "email", "hashed_password", "is_active", "created_at", "settings")
+
         def __init__(self, user_id: int, username: str, email: str, hashed_password: str):
             self.id = user_id
             self.username = username
@@ -43,19 +49,23 @@ def test_register_user_with_existing_email_returns_400(monkeypatch):
     class DummyDatabaseService:
         def __init__(self):
             self._users = []
+            self._by_username: dict[str, DummyUser] = {}
+            self._by_email: dict[str, DummyUser] = {}
 
         def close(self):
             pass
 
         def get_user_by_username(self, username: str):
-            return next((user for user in self._users if user.username == username), None)
+            return self._by_username.get(username)
 
         def get_user_by_email(self, email: str):
-            return next((user for user in self._users if user.email == email), None)
+            return self._by_email.get(email)
 
         def create_user(self, username: str, email: str, hashed_password: str):
             user = DummyUser(len(self._users) + 1, username, email, hashed_password)
             self._users.append(user)
+            self._by_username[username] = user
+            self._by_email[email] = user
             return user
 
     dummy_db = DummyDatabaseService()
@@ -63,15 +73,14 @@ def test_register_user_with_existing_email_returns_400(monkeypatch):
 
     monkeypatch.setattr(auth_module, "DatabaseService", lambda: dummy_db)
 
-    with TestClient(app) as client:
-        response = client.post(
-            "/api/auth/register",
-            json={
-                "username": "new_user",
-                "email": "existing@example.com",
-                "password": "supersecretpassword",
-            },
-        )
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "username": "new_user",
+            "email": "existing@example.com",
+            "password": "supersecretpassword",
+        },
+    )
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Email already registered"
@@ -6,11 +6,12 @@ from api.settings import DEFAULT_SETTINGS
 from fastapi import FastAPI, HTTPException, status
 from fastapi.testclient import TestClient
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def fake_user() -> SimpleNamespace:
     return SimpleNamespace(
         id=1,
@@ -21,18 +22,24 @@ def fake_user() -> SimpleNamespace:
     )
 
 
-@pytest.fixture
-def test_app(fake_user: SimpleNamespace) -> FastAPI:
+@pytest.fixture(scope="module")
+def test_app() -> FastAPI:
     app = FastAPI()
     app.include_router(router, prefix="/api/auth")
-    app.dependency_overrides[verify_token] = lambda: fake_user
     return app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client(test_app: FastAPI) -> TestClient:
-    with TestClient(test_app) as client:
-        yield client
+    # No lifespan handlers on this app, so skip the context manager.
+    return TestClient(test_app)
+
+
+@pytest.fixture(autouse=True)
+def _authenticated(test_app: FastAPI, fake_user: SimpleNamespace):
+    # The app is shared across the module; reinstate the override per test.
+    test_app.dependency_overrides[verify_token] = lambda: fake_user
+    yield
     test_app.dependency_overrides.clear()
 
 
@@ -87,20 +94,72 @@ def test_update_user_settings_user_not_found(monkeypatch: pytest.MonkeyPatch, cl
     assert response.json()["detail"] == "User not found"
 
 
-def test_partial_notification_update_preserves_other_channels(monkeypatch: pytest.MonkeyPatch, tmp_path):
+@pytest.fixture(scope="session")
+def shared_engine():
+    """In-memory engine with the schema built once for the whole session."""
     from services import database as database_module
 
-    db_file = tmp_path / "settings.db"
-    test_engine = create_engine(f"sqlite:///{db_file}", future=True)
-    TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    # A single shared in-memory connection keeps the schema visible to every
+    # session without touching the filesystem.
+    engine = create_engine(
+        "sqlite://",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
 
-    database_module.Base.metadata.create_all(bind=test_engine)
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, _record):  # noqa: ANN001
+        # Let SQLAlchemy emit BEGIN itself so pysqlite honours SAVEPOINTs.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):  # noqa: ANN001
+        connection.exec_driver_sql("BEGIN")
+
+    database_module.Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session_factory(shared_engine, monkeypatch: pytest.MonkeyPatch):
+    """Bind ``SessionLocal`` to an outer transaction rolled back after the test.
 
-    monkeypatch.setattr(database_module, "engine", test_engine, raising=False)
-    monkeypatch.setattr(database_module, "SessionLocal", TestSessionLocal, raising=False)
+    Service-level commits only release SAVEPOINTs, so every test starts from
+    the empty schema without rebuilding it.
+    """
+    from services import database as database_module
+
+    connection = shared_engine.connect()
+    transaction = connection.begin()
+    session_factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+    )
+
+    monkeypatch.setattr(database_module, "engine", shared_engine, raising=False)
+    monkeypatch.setattr(database_module, "SessionLocal", session_factory, raising=False)
     monkeypatch.setattr(database_module.secret_manager, "get", lambda key: None, raising=False)
     monkeypatch.setattr(database_module, "_SCHEMA_INITIALISED", True, raising=False)
 
+    try:
+        yield session_factory
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+def test_partial_notification_update_preserves_other_channels(db_session_factory):
+    from services import database as database_module
+
     service = database_module.DatabaseService()
 
     try:
@@ -115,7 +174,6 @@ def test_partial_notification_update_preserves_other_channels(monkeypatch: pytes
         assert notifications["slack"] is DEFAULT_SETTINGS["notifications"]["slack"]
     finally:
         service.close()
-        test_engine.dispose()
 
 
 def test_verify_token_returns_system_user_when_flag_enabled(monkeypatch: pytest.MonkeyPatch):
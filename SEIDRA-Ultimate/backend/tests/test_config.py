@@ -1,29 +1,37 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 from core.config import Settings, ensure_runtime_directories
 import pytest
 
 
+@pytest.fixture(scope="session")
+def base_settings() -> Settings:
+    # Validated once; tests derive variants with ``model_copy``.
+    return Settings(_env_file=None)
+
+
 @pytest.fixture()
-def tmp_settings(tmp_path: Path) -> Settings:
-    return Settings(
-        _env_file=None,
-        media_dir=tmp_path / "media",
-        thumbnail_dir=tmp_path / "media" / "thumbs",
-        models_dir=tmp_path / "models",
-        temp_dir=tmp_path / "tmp",
+def tmp_settings(base_settings: Settings, tmp_path: Path) -> Settings:
+    return base_settings.model_copy(
+        update={
+            "media_dir": tmp_path / "media",
+            "thumbnail_dir": tmp_path / "media" / "thumbs",
+            "models_dir": tmp_path / "models",
+            "temp_dir": tmp_path / "tmp",
+        }
     )
 
 
 def test_ensure_runtime_directories_creates_all_paths(tmp_settings: Settings) -> None:
     ensure_runtime_directories(tmp_settings)
 
-    assert tmp_settings.media_directory.exists()
-    assert tmp_settings.thumbnail_directory.exists()
-    assert tmp_settings.models_directory.exists()
-    assert tmp_settings.tmp_directory.exists()
+    assert os.path.isdir(tmp_settings.media_directory)
+    assert os.path.isdir(tmp_settings.thumbnail_directory)
+    assert os.path.isdir(tmp_settings.models_directory)
+    assert os.path.isdir(tmp_settings.tmp_directory)
 
 
 @pytest.mark.parametrize(
@@ -51,8 +59,15 @@ def test_environment_variable_defaults(monkeypatch: pytest.MonkeyPatch) -> None:
     assert settings.database_url.endswith("seidra.db")
 
 
-def test_tmp_directory_resolves_home(tmp_path: Path) -> None:
+def test_tmp_directory_resolves_home(base_settings: Settings, tmp_path: Path) -> None:
     configured_tmp = tmp_path / "home" / ".seidra" / "tmp"
-    settings = Settings(_env_file=None, temp_dir=configured_tmp)
+    settings = base_settings.model_copy(
+        update={
+            "media_dir": tmp_path / "media",
+            "thumbnail_dir": tmp_path / "media" / "thumbs",
+            "models_dir": tmp_path / "models",
+            "temp_dir": configured_tmp,
+        }
+    )
     ensure_runtime_directories(settings)
-    assert configured_tmp.exists()
+    assert os.path.isdir(configured_tmp)
@@ -1,86 +1,45 @@
 from datetime import datetime, timedelta
 from pathlib import Path
-import sys
-import types
 import uuid
 
 import pytest
-
-
-def _ensure_alembic_stub() -> None:
-    if "alembic" in sys.modules:
-        return
-
-    command_module = types.ModuleType("alembic.command")
-    command_module.upgrade = lambda *_, **__: None
-
-    config_module = types.ModuleType("alembic.config")
-
-    class _Config:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        def set_main_option(self, *args, **kwargs):
-            return None
-
-    config_module.Config = _Config
-
-    alembic_module = types.ModuleType("alembic")
-    alembic_module.command = command_module
-    alembic_module.config = config_module
-
-    sys.modules.setdefault("alembic", alembic_module)
-    sys.modules.setdefault("alembic.command", command_module)
-    sys.modules.setdefault("alembic.config", config_module)
+from sqlalchemy import event
 
 
 @pytest.fixture()
-def db_service(tmp_path, monkeypatch):
-    _ensure_alembic_stub()
+def db_service(database_session_factory):
     from services import database as database_module
 
-    original_engine = database_module.engine
-    original_session_local = database_module.SessionLocal
-
-    test_db_path = tmp_path / "media_filters.db"
-    monkeypatch.setenv("SEIDRA_DATABASE_URL", f"sqlite:///{test_db_path}")
-
     db = database_module.DatabaseService()
-    test_engine = database_module.engine
-    Base = database_module.Base
-    Base.metadata.drop_all(bind=test_engine)
-    Base.metadata.create_all(bind=test_engine)
-
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=test_engine)
-        test_engine.dispose()
-        database_module.engine = original_engine
-        database_module.SessionLocal = original_session_local
 
 
-def _create_user_personas(db):
-    user = db.create_user("media-user", "media@example.com", "hashed")
+def _create_user_personas(db, session):
+    user = db.create_user("media-user", "media@example.com", "hashed", session=session)
     persona_one = db.create_persona(
         user.id,
         name="Explorer",
         description="",
         style_prompt="style",
+        session=session,
     )
     persona_two = db.create_persona(
         user.id,
         name="Artist",
         description="",
         style_prompt="style",
+        session=session,
     )
     return user, persona_one, persona_two
 
 
-def _create_job(db, user_id, persona_id=None, prompt="Prompt"):
+def _create_job(db, session, user_id, persona_id=None, prompt="Prompt"):
     job_id = f"job-{uuid.uuid4()}"
     return db.create_job(
+        session=session,
         id=job_id,
         user_id=user_id,
         persona_id=persona_id,
@@ -93,68 +52,102 @@ def _create_job(db, user_id, persona_id=None, prompt="Prompt"):
     )
 
 
-def test_get_media_items_filters_combination(db_service):
-    user, persona_one, persona_two = _create_user_personas(db_service)
-    job_one = _create_job(db_service, user.id, persona_one.id, prompt="Sunset cliffs")
-    job_two = _create_job(db_service, user.id, persona_two.id, prompt="Studio portrait")
-    job_three = _create_job(db_service, user.id, persona_one.id, prompt="City skyline")
+def _bulk_create_media_items(db, rows):
+    # One bulk insert and a single commit stand in for N create_media_item
+    # round-trips; the prompt mirror it maintains is applied here instead.
+    from services import database as database_module
 
+    rows = [database_module.DatabaseService._mirror_media_prompt(row) for row in rows]
+    db.db.bulk_insert_mappings(database_module.MediaItem, rows)
+    db.db.commit()
+
+
+def test_get_media_items_filters_combination(db_service):
     base = datetime(2024, 1, 1, 12, 0, 0)
 
-    db_service.create_media_item(
-        id="media-1",
-        user_id=user.id,
-        job_id=job_one.id,
-        file_path=str(Path("/tmp/media-1.png")),
-        file_type="image",
-        mime_type="image/png",
-        metadata={"prompt": "Sunset cliffs"},
-        tags=["Sunset", "Landscape"],
-        is_favorite=True,
-        created_at=base,
-    )
-    db_service.create_media_item(
-        id="media-2",
-        user_id=user.id,
-        job_id=job_two.id,
-        file_path=str(Path("/tmp/media-2.png")),
-        file_type="image",
-        mime_type="image/png",
-        metadata={"prompt": "Studio portrait"},
-        tags=["Portrait"],
-        is_favorite=False,
-        created_at=base + timedelta(hours=1),
-    )
-    db_service.create_media_item(
-        id="media-3",
-        user_id=user.id,
-        job_id=job_three.id,
-        file_path=str(Path("/tmp/media-3.png")),
-        file_type="image",
-        mime_type="image/png",
-        metadata={"prompt": "City skyline"},
-        tags=["Night", "City"],
-        is_favorite=False,
-        created_at=base + timedelta(hours=2),
-    )
+    with db_service.bulk_setup() as session:
+        user, persona_one, persona_two = _create_user_personas(db_service, session)
+        job_one = _create_job(db_service, session, user.id, persona_one.id, prompt="Sunset cliffs")
+        job_two = _create_job(db_service, session, user.id, persona_two.id, prompt="Studio portrait")
+        job_three = _create_job(db_service, session, user.id, persona_one.id, prompt="City skyline")
 
-    items, total = db_service.get_media_items(user.id, favorites_only=True)
+        db_service.create_media_item(
+            session=session,
+            id="media-1",
+            user_id=user.id,
+            job_id=job_one.id,
+            file_path=str(Path("/tmp/media-1.png")),
+            file_type="image",
+            mime_type="image/png",
+            metadata={"prompt": "Sunset cliffs"},
+            tags=["Sunset", "Landscape"],
+            is_favorite=True,
+            created_at=base,
+        )
+        db_service.create_media_item(
+            session=session,
+            id="media-2",
+            user_id=user.id,
+            job_id=job_two.id,
+            file_path=str(Path("/tmp/media-2.png")),
+            file_type="image",
+            mime_type="image/png",
+            metadata={"prompt": "Studio portrait"},
+            tags=["Portrait"],
+            is_favorite=False,
+            created_at=base + timedelta(hours=1),
+        )
+        db_service.create_media_item(
+            session=session,
+            id="media-3",
+            user_id=user.id,
+            job_id=job_three.id,
+            file_path=str(Path("/tmp/media-3.png")),
+            file_type="image",
+            mime_type="image/png",
+            metadata={"prompt": "City skyline"},
+            tags=["Night", "City"],
+            is_favorite=False,
+            created_at=base + timedelta(hours=2),
+        )
+
+    items, total, _ = db_service.get_media_items(user.id, favorites_only=True)
     assert total == 1
     assert [item.id for item in items] == ["media-1"]
 
-    items, total = db_service.get_media_items(user.id, persona_id=persona_one.id)
+    items, total, _ = db_service.get_media_items(user.id, persona_id=persona_one.id)
     assert total == 2
     assert {item.id for item in items} == {"media-1", "media-3"}
 
-    items, total = db_service.get_media_items(user.id, tags=["night"])  # case-insensitive
+    items, total, _ = db_service.get_media_items(user.id, tags=["night"])  # case-insensitive
     assert total == 1
     assert items[0].id == "media-3"
 
-    items, total = db_service.get_media_items(user.id, search="portrait")
+    items, total, _ = db_service.get_media_items(user.id, tags=["NIGHT", "portrait", "night"])
+    assert total == 2
+    assert [item.id for item in items] == ["media-3", "media-2"]
+
+    items, total, _ = db_service.get_media_items(user.id, search="portrait")
     assert total == 1
     assert items[0].id == "media-2"
 
-    items, total = db_service.get_media_items(
+    items, total, _ = db_service.get_media_items(user.id, search="studio PORT")
+    assert total == 1
+    assert items[0].id == "media-2"
+
+    items, total, _ = db_service.get_media_items(user.id, search="sunset skyline")
+    assert total == 0
+
+    # Substring, not word-prefix, matching: through the index and below it.
+    items, total, _ = db_service.get_media_items(user.id, search="trait")
+    assert total == 1
+    assert items[0].id == "media-2"
+
+    items, total, _ = db_service.get_media_items(user.id, search="io")
+    assert total == 1
+    assert items[0].id == "media-2"
+
+    items, total, _ = db_service.get_media_items(
         user.id,
         tags=["city"],
         search="city",
@@ -166,28 +159,182 @@ def test_get_media_items_filters_combination(db_service):
 
 
 def test_get_media_items_respects_pagination(db_service):
-    user, persona_one, _ = _create_user_personas(db_service)
-    job = _create_job(db_service, user.id, persona_one.id)
+    with db_service.bulk_setup() as session:
+        user, persona_one, _ = _create_user_personas(db_service, session)
+        job = _create_job(db_service, session, user.id, persona_one.id)
 
     base = datetime(2024, 2, 1, 10, 0, 0)
     total_items = 60
-    for index in range(total_items):
-        db_service.create_media_item(
-            id=f"media-{index}",
-            user_id=user.id,
-            job_id=job.id,
-            file_path=str(Path(f"/tmp/media-{index}.png")),
-            file_type="image",
-            mime_type="image/png",
-            metadata={"prompt": f"Prompt {index}"},
-            tags=["batch", str(index % 3)],
-            is_favorite=index % 2 == 0,
-            created_at=base + timedelta(minutes=index),
-        )
+    _bulk_create_media_items(
+        db_service,
+        [
+            {
+                "id": f"media-{index}",
+                "user_id": user.id,
+                "job_id": job.id,
+                "file_path": str(Path(f"/tmp/media-{index}.png")),
+                "file_type": "image",
+                "mime_type": "image/png",
+                "metadata_payload": {"prompt": f"Prompt {index}"},
+                "tags": ["batch", str(index % 3)],
+                "is_favorite": index % 2 == 0,
+                "created_at": base + timedelta(minutes=index),
+            }
+            for index in range(total_items)
+        ],
+    )
 
-    items, total = db_service.get_media_items(user.id, limit=15, offset=20)
+    items, total, _ = db_service.get_media_items(user.id, limit=15, offset=20)
     assert total == total_items
     assert len(items) == 15
 
     expected_ids = [f"media-{total_items - 1 - offset}" for offset in range(20, 35)]
     assert [item.id for item in items] == expected_ids
+
+    items, total, _ = db_service.get_media_items(user.id, favorites_only=True, limit=5)
+    assert total == total_items // 2
+    assert [item.id for item in items] == [f"media-{index}" for index in (58, 56, 54, 52, 50)]
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page, total, cursor = db_service.get_media_items(user.id, limit=25, cursor=cursor)
+        assert total == total_items
+        seen.extend(item.id for item in page)
+        if cursor is None:
+            break
+
+    assert seen == [f"media-{index}" for index in reversed(range(total_items))]
+
+
+def test_favorites_listing_uses_favorites_index(db_service, database_engine):
+    with db_service.bulk_setup() as session:
+        user, persona_one, _ = _create_user_personas(db_service, session)
+        _create_job(db_service, session, user.id, persona_one.id)
+
+    statements: list[tuple[str, tuple]] = []
+
+    def _capture(_conn, _cursor, statement, parameters, _context, _executemany):  # noqa: ANN001
+        if "ORDER BY" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(database_engine, "before_cursor_execute", _capture)
+    try:
+        db_service.get_media_items(user.id, favorites_only=True, limit=10)
+    finally:
+        event.remove(database_engine, "before_cursor_execute", _capture)
+
+    assert len(statements) == 1
+    statement, parameters = statements[0]
+    plan = db_service.db.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX ix_media_user_fav_created" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_get_media_items_reuses_statements_per_shape(db_service, monkeypatch):
+    from services import database as database_module
+
+    monkeypatch.setattr(database_module, "_GET_MEDIA_SQL_CACHE", {})
+    with db_service.bulk_setup() as session:
+        user, _, _ = _create_user_personas(db_service, session)
+
+    db_service.get_media_items(user.id, tags=["night"], favorites_only=True)
+    db_service.get_media_items(user.id, tags=["day"], favorites_only=True)
+    db_service.get_media_items(user.id, tags=["dawn", "dusk", "noon"], favorites_only=True)
+
+    assert len(database_module._GET_MEDIA_SQL_CACHE) == 1
+
+
+def test_search_without_fts_matches_prompt_column(db_service, monkeypatch):
+    from services import database as database_module
+
+    with db_service.bulk_setup() as session:
+        user, persona_one, _ = _create_user_personas(db_service, session)
+        job = _create_job(db_service, session, user.id, persona_one.id)
+        media = db_service.create_media_item(
+            session=session,
+            id="media-prompt",
+            user_id=user.id,
+            job_id=job.id,
+            file_path=str(Path("/tmp/media-prompt.png")),
+            metadata={"prompt": "Misty Harbour at dawn"},
+            tags=["Sea"],
+        )
+
+    assert media.prompt == "Misty Harbour at dawn"
+
+    media = db_service.update_media_item(
+        "media-prompt", user.id, metadata={"prompt": "Misty Harbour at dusk"}
+    )
+    assert media.prompt == "Misty Harbour at dusk"
+
+    monkeypatch.setattr(
+        database_module.DatabaseService,
+        "_has_sqlite_table",
+        lambda self, name: name != database_module.MEDIA_FTS_TABLE,
+    )
+    items, total, _ = db_service.get_media_items(user.id, search="harbour at dusk")
+    assert total == 1
+    assert items[0].id == "media-prompt"
+
+    _, total, _ = db_service.get_media_items(user.id, search="dawn")
+    assert total == 0
+
+
+def test_fts_search_matches_decoded_tag_values(db_service):
+    from services import database as database_module
+
+    with db_service.bulk_setup() as session:
+        user, persona_one, _ = _create_user_personas(db_service, session)
+        job = _create_job(db_service, session, user.id, persona_one.id)
+        db_service.create_media_item(
+            session=session,
+            id="media-tags",
+            user_id=user.id,
+            job_id=job.id,
+            file_path=str(Path("/tmp/media-tags.png")),
+            metadata={"prompt": "Quiet garden"},
+            tags=["Été", "Noon"],
+        )
+
+    if not db_service._has_sqlite_table(database_module.MEDIA_FTS_TABLE):
+        pytest.skip("SQLite build without the trigram tokenizer")
+
+    items, total, _ = db_service.get_media_items(user.id, search="été")
+    assert total == 1
+    assert items[0].id == "media-tags"
+
+    # Neither JSON escapes nor the separators between tags are indexed.
+    for search in ("u00c9", '", "', '"]'):
+        _, total, _ = db_service.get_media_items(user.id, search=search)
+        assert total == 0, search
+
+    db_service.update_media_item("media-tags", user.id, tags=["Automne"])
+    _, total, _ = db_service.get_media_items(user.id, search="été")
+    assert total == 0
+    _, total, _ = db_service.get_media_items(user.id, search="tomn")
+    assert total == 1
+
+
+def test_side_table_lookup_is_cached_per_engine(db_service, database_engine):
+    with db_service.bulk_setup() as session:
+        user, _, _ = _create_user_personas(db_service, session)
+
+    db_service.get_media_items(user.id, search="portrait")
+
+    statements: list[str] = []
+
+    def _capture(_conn, _cursor, statement, _parameters, _context, _executemany):  # noqa: ANN001
+        statements.append(statement)
+
+    event.listen(database_engine, "before_cursor_execute", _capture)
+    try:
+        db_service.get_media_items(user.id, search="portrait")
+    finally:
+        event.remove(database_engine, "before_cursor_execute", _capture)
+
+    assert statements
+    assert not any("sqlite_master" in statement for statement in statements)
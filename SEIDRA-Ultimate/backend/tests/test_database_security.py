@@ -56,25 +56,28 @@ def stub_hashing(monkeypatch: pytest.MonkeyPatch):
         calls.append(password)
         return f"hashed::{password}"
 
+    def fake_matches(password: str, hashed_password: str | None) -> bool:
+        return hashed_password == f"hashed::{password}"
+
     monkeypatch.setattr(database, "_hash_password", fake_hash)
+    monkeypatch.setattr(database, "_password_matches", fake_matches)
     return calls
 
 
-@pytest.fixture
-def in_memory_db(monkeypatch: pytest.MonkeyPatch):
-    engine = database.create_engine("sqlite:///:memory:", echo=False, future=True)
-    testing_session = database.sessionmaker(
-        autocommit=False, autoflush=False, bind=engine
-    )
+@pytest.fixture(autouse=True)
+def fresh_secrets():
+    # The secret manager caches environment lookups; each test sets its own.
+    database.secret_manager.clear_cache()
+    yield
+    database.secret_manager.clear_cache()
 
-    monkeypatch.setattr(database, "engine", engine)
-    monkeypatch.setattr(database, "SessionLocal", testing_session)
 
-    database.Base.metadata.create_all(bind=engine)
-    try:
-        yield testing_session
-    finally:
-        database.Base.metadata.drop_all(bind=engine)
+@pytest.fixture
+def in_memory_db(database_session_factory, bind_database_module):
+    # Other test modules re-import ``services.database``; bind the one used here.
+    # Rows are rolled back with the outer transaction after each test.
+    bind_database_module(database)
+    return database_session_factory
 
 
 def test_insecure_default_password_is_rejected(monkeypatch: pytest.MonkeyPatch):
@@ -111,6 +114,7 @@ def test_default_user_password_rotation(
         assert first_rotation is not None
 
     monkeypatch.setenv(database.DEFAULT_USER_PASSWORD_ENV, "An0ther-StrongSecret")
+    database.secret_manager.clear_cache()  # a rotation is picked up on restart
     database.seed_default_user()
 
     with in_memory_db() as session:
@@ -120,12 +124,11 @@ def test_default_user_password_rotation(
         assert user.is_active is True
         second_rotation = user.settings["security"]["default_user_last_rotation"]
         assert second_rotation != first_rotation
-    assert stub_hashing.count("Sup3rSecurePassw0rd!") == 1
-    assert stub_hashing.count("An0ther-StrongSecret") == 1
+    assert stub_hashing == ["Sup3rSecurePassw0rd!", "An0ther-StrongSecret"]
 
 
 def test_default_user_rotation_timestamp_preserved_when_password_unchanged(
-    in_memory_db, monkeypatch: pytest.MonkeyPatch
+    in_memory_db, monkeypatch: pytest.MonkeyPatch, stub_hashing: list[str]
 ):
     monkeypatch.setenv(database.DEFAULT_USER_PASSWORD_ENV, "SameSecret-123!")
     database.seed_default_user()
@@ -136,3 +139,24 @@ def test_default_user_rotation_timestamp_preserved_when_password_unchanged(
 
     assert first_rotation is not None
     assert second_rotation == first_rotation
+    # The second seed verified the stored hash instead of hashing again.
+    assert stub_hashing == ["SameSecret-123!"]
+
+
+def test_default_user_template_reapplied_when_password_unchanged(
+    in_memory_db, monkeypatch: pytest.MonkeyPatch, stub_hashing: list[str]
+):
+    monkeypatch.setenv(database.DEFAULT_USER_PASSWORD_ENV, "SameSecret-123!")
+    database.seed_default_user()
+
+    with in_memory_db() as session:
+        user = session.query(database.User).one()
+        user.email = "drifted@example.com"
+        session.commit()
+
+    database.seed_default_user()
+
+    with in_memory_db() as session:
+        user = session.query(database.User).one()
+        assert user.email == database.DEFAULT_USER_TEMPLATE["email"]
+    assert stub_hashing == ["SameSecret-123!"]
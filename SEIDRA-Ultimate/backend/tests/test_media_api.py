@@ -43,7 +43,7 @@ def media_test_app(tmp_path, monkeypatch):
                     nsfw_tags=[],
                     created_at=now,
                 )
-                return [item], 1
+                return [item], 1, None
 
             def close(self):
                 self._closed = True
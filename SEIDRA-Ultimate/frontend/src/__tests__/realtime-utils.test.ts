@@ -0,0 +1,26 @@
+import { describe, expect, it } from 'vitest'
+
+import { applySystemStatus } from '../lib/realtime-utils'
+
+describe('applySystemStatus', () => {
+  const base = { snapshot: { gpu: { temperature: 60 }, remote: { ok: true } }, seq: 4 }
+
+  it('replaces the snapshot on a keyframe', () => {
+    expect(applySystemStatus(base, { data: { gpu: { temperature: 61 } }, seq: 9, delta: false })).toEqual({
+      snapshot: { gpu: { temperature: 61 } },
+      seq: 9,
+    })
+  })
+
+  it('merges the next delta and drops tombstoned keys', () => {
+    expect(
+      applySystemStatus(base, { data: { gpu: { temperature: 62 }, remote: null }, seq: 5, delta: true }),
+    ).toEqual({ snapshot: { gpu: { temperature: 62 } }, seq: 5 })
+  })
+
+  it('rejects a delta after a seq gap or without a keyframe', () => {
+    expect(applySystemStatus(base, { data: {}, seq: 6, delta: true })).toBeNull()
+    expect(applySystemStatus({ snapshot: base.snapshot, seq: null }, { data: {}, seq: 5, delta: true })).toBeNull()
+    expect(applySystemStatus({ snapshot: null, seq: null }, { data: {}, delta: true })).toBeNull()
+  })
+})
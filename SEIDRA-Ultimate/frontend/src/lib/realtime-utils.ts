@@ -95,3 +95,48 @@ export function extractJobMessages(jobUpdates: Record<string, JobRealtimeUpdate>
   }
   return result
 }
+
+export type SystemStatusFrame = {
+  data?: Record<string, unknown> | null
+  seq?: number
+  delta?: boolean
+}
+
+export type SystemStatusState = {
+  snapshot: Record<string, unknown> | null
+  seq: number | null
+}
+
+/**
+ * Apply a `system_status` frame to the current state.
+ *
+ * Keyframes replace the snapshot. Deltas merge top-level keys, and a `null`
+ * value removes the key. Returns `null` when a delta cannot be applied:
+ * there is no base snapshot, or its `seq` does not follow the last one
+ * applied. The caller should then request a resync and wait for a keyframe.
+ */
+export function applySystemStatus(
+  state: SystemStatusState,
+  frame: SystemStatusFrame,
+): SystemStatusState | null {
+  const seq = typeof frame.seq === 'number' ? frame.seq : null
+  if (!frame.delta) {
+    return { snapshot: frame.data ?? null, seq }
+  }
+  if (state.snapshot === null) {
+    return null
+  }
+  if (seq !== null && (state.seq === null || seq !== state.seq + 1)) {
+    return null
+  }
+
+  const snapshot = { ...state.snapshot }
+  for (const [key, value] of Object.entries(frame.data ?? {})) {
+    if (value === null) {
+      delete snapshot[key]
+    } else {
+      snapshot[key] = value
+    }
+  }
+  return { snapshot, seq: seq ?? state.seq }
+}
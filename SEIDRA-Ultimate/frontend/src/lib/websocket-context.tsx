@@ -12,6 +12,7 @@ import {
 import { toast } from 'react-hot-toast'
 
 import { apiClient, type RealtimeNotification } from './api-client'
+import { applySystemStatus, type SystemStatusState } from './realtime-utils'
 
 const MAX_NOTIFICATIONS = 200
 
@@ -73,6 +74,11 @@ function mergeNotifications(
   )
 }
 
+async function inflateFrame(data: ArrayBuffer): Promise<string> {
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return new Response(stream).text()
+}
+
 export function WebSocketProvider({ children }: { children: React.ReactNode }) {
   const [status, setStatus] = useState<'disconnected' | 'connecting' | 'connected'>(
     'disconnected',
@@ -88,6 +94,11 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
   }>({ total: 0, limit: 20, nextOffset: 0, hasMore: false })
   const [loadingNotifications, setLoadingNotifications] = useState(false)
   const socketRef = useRef<WebSocket | null>(null)
+  const frameChainRef = useRef<Promise<void>>(Promise.resolve())
+  // Mirrors the applied system status and its seq so deltas can be checked
+  // for gaps before they reach React state.
+  const systemStateRef = useRef<SystemStatusState>({ snapshot: null, seq: null })
+  const resyncPendingRef = useRef(false)
 
   const storeJobUpdate = useCallback((update: JobRealtimeUpdate) => {
     const jobId = update.jobId
@@ -147,88 +158,124 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
     }
   }, [])
 
-  const handleMessage = useCallback(
-    (event: MessageEvent<string>) => {
-      try {
-        const payload = JSON.parse(event.data)
-        if (!payload || typeof payload !== 'object') return
-
-        switch (payload.type) {
-          case 'system_status':
-            setSystemStatus(payload.data ?? null)
-            break
-          case 'job_queued':
-            storeJobUpdate({
-              jobId: payload.jobId,
-              status: 'queued',
-              progress: 0,
-              timestamp: payload.timestamp,
-              jobType: payload.jobType,
-              modelName: payload.modelName,
-              createdAt: payload.createdAt,
-              metadata: payload,
-            })
-            break
-          case 'generation_progress':
-            storeJobUpdate({
-              jobId: payload.jobId,
-              status: payload.status,
-              progress: payload.progress,
-              message: payload.message,
-              timestamp: payload.timestamp,
-              jobType: payload.metadata?.jobType ?? payload.jobType,
-              modelName: payload.metadata?.modelName ?? payload.modelName,
-              createdAt: payload.metadata?.createdAt ?? payload.createdAt,
-              metadata: payload.metadata ?? payload,
-            })
-            break
-          case 'generation_complete':
-            storeJobUpdate({
-              jobId: payload.jobId,
-              status: 'completed',
-              progress: 1,
-              resultImages: payload.result,
-              timestamp: payload.timestamp,
-              message: 'Generation completed',
-              metadata: payload.metadata ?? payload,
-              completedAt: payload.metadata?.completedAt,
-            })
-            break
-          case 'generation_error':
-            storeJobUpdate({
-              jobId: payload.jobId,
-              status: 'failed',
-              progress: 1,
-              message: payload.error,
-              error: payload.error,
-              timestamp: payload.timestamp,
-            })
-            break
-          case 'batch_queued':
-            // handled via notifications for user feedback
-            break
-          case 'notification':
-            handleNotification({
-              id: payload.id,
-              level: payload.level ?? 'info',
-              title: payload.title ?? 'Notification',
-              message: payload.message ?? '',
-              category: payload.category ?? 'system',
-              metadata: payload.metadata ?? {},
-              tags: payload.tags ?? [],
-              timestamp: payload.timestamp ?? new Date().toISOString(),
-            })
-            break
-          default:
+  const handlePayload = useCallback(
+    (payload: any) => {
+      if (!payload || typeof payload !== 'object') return
+
+      switch (payload.type) {
+        case 'system_status': {
+          const next = applySystemStatus(systemStateRef.current, payload)
+          if (next === null) {
+            // A delta was lost or arrived before any keyframe: ask for a full
+            // snapshot and ignore deltas until it arrives.
+            if (!resyncPendingRef.current && socketRef.current?.readyState === WebSocket.OPEN) {
+              resyncPendingRef.current = true
+              socketRef.current.send(JSON.stringify({ type: 'resync' }))
+            }
             break
+          }
+          if (!payload.delta) {
+            resyncPendingRef.current = false
+          }
+          systemStateRef.current = next
+          setSystemStatus(next.snapshot)
+          break
         }
-      } catch (error) {
-        console.warn('Failed to parse websocket message', error)
+        case 'job_queued':
+          storeJobUpdate({
+            jobId: payload.jobId,
+            status: 'queued',
+            progress: 0,
+            timestamp: payload.timestamp,
+            jobType: payload.jobType,
+            modelName: payload.modelName,
+            createdAt: payload.createdAt,
+            metadata: payload,
+          })
+          break
+        case 'generation_progress':
+          storeJobUpdate({
+            jobId: payload.jobId,
+            status: payload.status,
+            progress: payload.progress,
+            message: payload.message,
+            timestamp: payload.timestamp,
+            jobType: payload.metadata?.jobType ?? payload.jobType,
+            modelName: payload.metadata?.modelName ?? payload.modelName,
+            createdAt: payload.metadata?.createdAt ?? payload.createdAt,
+            metadata: payload.metadata ?? payload,
+          })
+          break
+        case 'generation_complete':
+          storeJobUpdate({
+            jobId: payload.jobId,
+            status: 'completed',
+            progress: 1,
+            resultImages: payload.result,
+            timestamp: payload.timestamp,
+            message: 'Generation completed',
+            metadata: payload.metadata ?? payload,
+            completedAt: payload.metadata?.completedAt,
+          })
+          break
+        case 'generation_error':
+          storeJobUpdate({
+            jobId: payload.jobId,
+            status: 'failed',
+            progress: 1,
+            message: payload.error,
+            error: payload.error,
+            timestamp: payload.timestamp,
+          })
+          break
+        case 'ping':
+          // Server-initiated liveness probe for otherwise idle connections
+          if (socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(JSON.stringify({ type: 'heartbeat' }))
+          }
+          break
+        case 'batch_queued':
+          // handled via notifications for user feedback
+          break
+        case 'notification':
+          handleNotification({
+            id: payload.id,
+            level: payload.level ?? 'info',
+            title: payload.title ?? 'Notification',
+            message: payload.message ?? '',
+            category: payload.category ?? 'system',
+            metadata: payload.metadata ?? {},
+            tags: payload.tags ?? [],
+            timestamp: payload.timestamp ?? new Date().toISOString(),
+          })
+          break
+        default:
+          break
       }
     },
     [handleNotification, storeJobUpdate],
   )
 
+  const handleMessage = useCallback(
+    (event: MessageEvent<string | ArrayBuffer>) => {
+      const { data } = event
+      // Large broadcasts arrive as zlib-compressed binary frames; chain every frame
+      // so asynchronous inflation never reorders messages.
+      frameChainRef.current = frameChainRef.current
+        .then(() => (typeof data === 'string' ? data : inflateFrame(data)))
+        .then((text) => {
+          const parsed = JSON.parse(text)
+          // The server coalesces bursts of events into a single JSON array frame
+          const payloads = Array.isArray(parsed) ? parsed : [parsed]
+          payloads.forEach(handlePayload)
+        })
+        .catch((error) => {
+          console.warn('Failed to parse websocket message', error)
+        })
+    },
+    [handlePayload],
+  )
+
   useEffect(() => {
     let cancelled = false
 
@@ -236,6 +283,8 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
       try {
         const info = await apiClient.getSystemInfo()
         if (!cancelled) {
+          // Seq-less baseline: the first websocket keyframe replaces it.
+          systemStateRef.current = { snapshot: info, seq: null }
           setSystemStatus(info)
           if (Array.isArray(info.notifications) && info.notifications.length) {
             setNotifications((prev) =>
@@ -288,9 +337,12 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
       url.searchParams.set('channels', 'jobs,system,notifications')
 
       const socket = new WebSocket(url.toString())
+      socket.binaryType = 'arraybuffer'
       socketRef.current = socket
 
       socket.addEventListener('open', () => {
+        systemStateRef.current = { ...systemStateRef.current, seq: null }
+        resyncPendingRef.current = false
         setStatus('connected')
         socket.send(
           JSON.stringify({ type: 'subscribe', channels: ['jobs', 'system', 'notifications'] }),